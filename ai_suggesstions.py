@@ -1,24 +1,62 @@
 import os
-from supabase import create_client
-from groq import Groq
-import numpy as np
-from typing import List, Dict, Union
+import json
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Union
 from rich.console import Console
 from rich.panel import Panel
+from rich.live import Live
 from rich.table import Table
 from rich import box
 from rich.text import Text
+from metrics import increment, metrics, timer
+
+# groq, numpy, the storage SDKs and the index modules are imported where they
+# are used so that importing this module (and the CLI) stays fast
+if TYPE_CHECKING:
+    from job_index import JobIndex
+    from llm_cache import LLMResponseCache
+    from resume_matches import ResumeMatchStore
+    from storage import Storage
 
 # Initialize clients
-SUPABASE_API_KEY = "your key"
-SUPABASE_URL = "your url"
 GROQ_API_KEY = "your groq key"
 
 
-supabase = create_client(SUPABASE_URL, SUPABASE_API_KEY)
-groq_client = Groq(api_key=GROQ_API_KEY)
+@lru_cache(maxsize=None)
+def get_storage() -> "Storage":
+    """Shared storage backend, opened on first use"""
+    from storage import open_storage
+
+    # Supabase by default; set JOB_STORAGE=sqlite:<path> to run against a local file
+    return open_storage()
+
+
+@lru_cache(maxsize=None)
+def get_groq_client():
+    """Shared Groq client, created on first use"""
+    from groq import Groq
+
+    return Groq(api_key=GROQ_API_KEY)
 
 
+def __getattr__(name: str):
+    # Keep `ai_suggesstions.storage` / `.groq_client` working for callers
+    if name == "storage":
+        return get_storage()
+    if name == "groq_client":
+        return get_groq_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# LLM settings; bump PROMPT_VERSION whenever the prompt text changes so cached
+# responses generated from the old prompt are not reused
+GROQ_MODEL = "mixtral-8x7b-32768"
+PROMPT_VERSION = "2"
+TEMPERATURE = 0.7
+MAX_TOKENS = 1000
+PROMPT_TOKEN_BUDGET = 1500
+SYSTEM_PROMPT = "You are a professional career advisor. Analyze the candidate's profile and the matching jobs to provide personalized job recommendations. Focus on how the candidate's skills and experience align with each role."
+
 
 def print_formatted_results(results: Dict):
     """Print formatted results using rich"""
@@ -91,27 +129,9 @@ def fetch_resume_by_filename(filename: str) -> Union[Dict, None]:
     Fetch resume data from both PDF and DOCX tables based on filename
     """
     try:
-        # Check PDF files
-        pdf_response = supabase.table("pdf_files") \
-            .select("*") \
-            .eq("filename", filename) \
-            .limit(1) \
-            .execute()
-            
-        if pdf_response.data:
-            return pdf_response.data[0]
-            
-        # Check DOCX files
-        docx_response = supabase.table("docx_files") \
-            .select("*") \
-            .eq("filename", filename) \
-            .limit(1) \
-            .execute()
-            
-        if docx_response.data:
-            return docx_response.data[0]
-            
-        return None
+        # Checks the PDF table first, then DOCX
+        with timer("resume_fetch"):
+            return get_storage().fetch_by_filename(filename)
     except Exception as e:
         print(f"Error fetching resume: {str(e)}")
         return None
@@ -120,6 +140,8 @@ def calculate_similarity(vec1: List[float], vec2: List[float]) -> float:
     """
     Calculate cosine similarity between two vectors
     """
+    import numpy as np
+
     vec1 = np.array(vec1)
     vec2 = np.array(vec2)
     return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
@@ -130,18 +152,16 @@ def find_matching_jobs(resume_data: Dict, limit: int = 5) -> List[Dict]:
     """
     try:
         # Get all jobs with their embeddings
-        jobs_response = supabase.table("jobs") \
-            .select("*") \
-            .execute()
+        jobs = get_storage().fetch_rows("jobs")
             
-        if not jobs_response.data:
+        if not jobs:
             return []
 
         # Calculate similarities
         similarities = []
         resume_embedding = resume_data.get("embeddings", [])
         
-        for job in jobs_response.data:
+        for job in jobs:
             job_embedding = job.get("embeddings", [])
             if job_embedding and resume_embedding:
                 similarity = calculate_similarity(resume_embedding, job_embedding)
@@ -154,48 +174,242 @@ def find_matching_jobs(resume_data: Dict, limit: int = 5) -> List[Dict]:
         print(f"Error finding matching jobs: {str(e)}")
         return []
 
-def generate_job_recommendations(resume_data: Dict, matching_jobs: List[Dict]) -> str:
+def _job_dict(job: Union[Dict, tuple]) -> Dict:
+    """Accept both plain job rows and (job, score) tuples from find_matching_jobs"""
+    return job[0] if isinstance(job, tuple) else job
+
+def _recommendation_cache_key(resume_data: Dict, jobs: List[Dict]) -> str:
+    from llm_cache import make_cache_key
+
+    return make_cache_key(
+        resume_data,
+        [job.get('id') for job in jobs],
+        GROQ_MODEL,
+        PROMPT_VERSION,
+        {"temperature": TEMPERATURE, "max_tokens": MAX_TOKENS, "token_budget": PROMPT_TOKEN_BUDGET}
+    )
+
+def build_recommendation_messages(resume_data: Dict, jobs: List[Dict],
+                                  token_budget: int = PROMPT_TOKEN_BUDGET) -> tuple[List[Dict], Dict]:
+    """
+    Build the chat messages sent to Groq and the prompt compaction stats. The
+    token counts before and after compaction are added to the prompt_tokens_*
+    counters, so the blocking and bulk paths report them too.
+    """
+    from prompt_builder import build_resume_context
+
+    resume_context, prompt_stats = build_resume_context(resume_data, jobs, token_budget)
+    increment("prompt_tokens_before", prompt_stats["tokens_before"])
+    increment("prompt_tokens_after", prompt_stats["tokens_after"])
+
+    messages = [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": resume_context
+        }
+    ]
+    return messages, prompt_stats
+
+def generate_job_recommendations(resume_data: Dict, matching_jobs: List[Dict],
+                                 cache: Union["LLMResponseCache", None] = None,
+                                 client=None) -> str:
     """
     Generate AI-powered job recommendations based on resume and matching jobs
     """
     try:
-        # Create context for AI
-        resume_context = f"""
-        Candidate Profile:
-        Education: {resume_data.get('education', 'Not specified')}
-        Skills: {resume_data.get('skills', 'Not specified')}
-        Experience: {resume_data.get('experience', 'Not specified')}
-        
-        Top Matching Jobs:
-        {[{
-            'position': job.get('job_position'),
-            'company': job.get('company_name'),
-            'requirements': job.get('required_qualifications'),
-            'responsibilities': job.get('job_responsibilities')
-        } for job in matching_jobs]}
-        """
+        jobs = [_job_dict(job) for job in matching_jobs]
+        client = client or get_groq_client()
+
+        cache_key = None
+        if cache is not None:
+            cache_key = _recommendation_cache_key(resume_data, jobs)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        messages, _ = build_recommendation_messages(resume_data, jobs)
 
         # Generate recommendations using Groq
-        completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a professional career advisor. Analyze the candidate's profile and the matching jobs to provide personalized job recommendations. Focus on how the candidate's skills and experience align with each role."
-                },
-                {
-                    "role": "user",
-                    "content": resume_context
-                }
-            ],
-            model="mixtral-8x7b-32768",
-            temperature=0.7,
-            max_tokens=1000
-        )
+        increment("llm_requests")
+        with timer("llm_generation"):
+            completion = client.chat.completions.create(
+                messages=messages,
+                model=GROQ_MODEL,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS
+            )
         
-        return completion.choices[0].message.content
+        recommendations = completion.choices[0].message.content
+        if cache_key is not None and recommendations:
+            cache.set(cache_key, recommendations)
+        return recommendations
     except Exception as e:
+        increment("llm_errors")
         print(f"Error generating recommendations: {str(e)}")
         return "Unable to generate recommendations at this time."
+
+def generate_recommendations_bulk(items: List[tuple[Dict, List[Dict]]],
+                                  cache: Union["LLMResponseCache", None] = None,
+                                  client=None,
+                                  requests_per_minute: float = 30,
+                                  tokens_per_minute: float = 6000,
+                                  max_workers: int = 8,
+                                  output_path: Union[str, None] = None) -> List[str]:
+    """
+    Generate career advice for many (resume_data, matching_jobs) pairs
+    concurrently within the provider's rate limits. Results are returned, and
+    optionally appended to output_path as JSON lines, in input order.
+    """
+    from llm_scheduler import RateLimitedScheduler
+
+    client = client or get_groq_client()
+    scheduler = RateLimitedScheduler(client, requests_per_minute, tokens_per_minute, max_workers)
+    recommendations: List[Union[str, None]] = [None] * len(items)
+    cache_keys = [None] * len(items)
+    pending = []
+
+    for idx, (resume_data, matching_jobs) in enumerate(items):
+        jobs = [_job_dict(job) for job in matching_jobs]
+        if cache is not None:
+            cache_keys[idx] = _recommendation_cache_key(resume_data, jobs)
+            recommendations[idx] = cache.get(cache_keys[idx])
+        if recommendations[idx] is None:
+            messages, _ = build_recommendation_messages(resume_data, jobs)
+            pending.append((idx, {
+                "messages": messages,
+                "model": GROQ_MODEL,
+                "temperature": TEMPERATURE,
+                "max_tokens": MAX_TOKENS
+            }))
+
+    output = open(output_path, "a", encoding="utf-8") if output_path else None
+    ready = [recommendation is not None for recommendation in recommendations]
+    written = [0]
+
+    def write_ready():
+        # Append finished items in input order as soon as each prefix is
+        # complete, so an interrupted batch keeps everything already generated
+        if output is None:
+            return
+        while written[0] < len(items) and ready[written[0]]:
+            output.write(json.dumps({
+                "filename": items[written[0]][0].get("filename"),
+                "recommendations": recommendations[written[0]]
+            }) + "\n")
+            written[0] += 1
+        output.flush()
+
+    def store(position: int, completion):
+        idx = pending[position][0]
+        if isinstance(completion, Exception):
+            increment("llm_errors")
+            print(f"Error generating recommendations for item {idx}: {str(completion)}")
+            recommendations[idx] = "Unable to generate recommendations at this time."
+        else:
+            recommendations[idx] = completion.choices[0].message.content
+            if cache_keys[idx] is not None and recommendations[idx]:
+                cache.set(cache_keys[idx], recommendations[idx])
+        ready[idx] = True
+        write_ready()
+
+    increment("llm_requests", len(pending))
+    try:
+        write_ready()
+        with timer("llm_batch"):
+            scheduler.run([request for _, request in pending], on_result=store)
+    finally:
+        if output is not None:
+            output.close()
+
+    return recommendations
+
+def _advice_panel(text: str, subtitle: str = "") -> Panel:
+    return Panel(
+        text,
+        title="[bold magenta]Professional Recommendations",
+        subtitle=subtitle,
+        border_style="magenta",
+        box=box.ROUNDED
+    )
+
+def stream_job_recommendations(resume_data: Dict, matching_jobs: List[Dict],
+                               console: Union[Console, None] = None,
+                               cache: Union["LLMResponseCache", None] = None,
+                               client=None) -> Dict:
+    """
+    Stream AI recommendations into a live console panel as tokens arrive.
+
+    Returns the full text together with time-to-first-token and total
+    generation time in seconds.
+    """
+    console = console or Console()
+    jobs = [_job_dict(job) for job in matching_jobs]
+    client = client or get_groq_client()
+    result = {"text": "", "time_to_first_token": None, "total_time": None, "cached": False}
+
+    cache_key = None
+    if cache is not None:
+        cache_key = _recommendation_cache_key(resume_data, jobs)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            console.print(_advice_panel(cached, "[dim]cached"))
+            result.update(text=cached, time_to_first_token=0.0, total_time=0.0, cached=True)
+            return result
+
+    messages, prompt_stats = build_recommendation_messages(resume_data, jobs)
+    result["prompt_tokens_before"] = prompt_stats["tokens_before"]
+    result["prompt_tokens_after"] = prompt_stats["tokens_after"]
+
+    parts = []
+    increment("llm_requests")
+    start = time.perf_counter()
+    try:
+        stream = client.chat.completions.create(
+            messages=messages,
+            model=GROQ_MODEL,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            stream=True
+        )
+        with Live(_advice_panel("[dim]Thinking..."), console=console,
+                  refresh_per_second=15) as live:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if not token:
+                    continue
+                if result["time_to_first_token"] is None:
+                    result["time_to_first_token"] = time.perf_counter() - start
+                parts.append(token)
+                live.update(_advice_panel("".join(parts)))
+
+            result["total_time"] = time.perf_counter() - start
+            result["text"] = "".join(parts)
+            metrics.observe("llm_generation", result["total_time"])
+            if result["time_to_first_token"] is not None:
+                metrics.observe("llm_first_token", result["time_to_first_token"])
+            live.update(_advice_panel(
+                result["text"],
+                f"[dim]first token {result['time_to_first_token'] or 0:.2f}s · "
+                f"total {result['total_time']:.2f}s"
+            ))
+    except Exception as e:
+        increment("llm_errors")
+        console.print(f"[red]Error generating recommendations: {str(e)}[/red]")
+        result["text"] = "".join(parts) or "Unable to generate recommendations at this time."
+        result["total_time"] = time.perf_counter() - start
+        metrics.observe("llm_generation_error", result["total_time"])
+        return result
+
+    if cache_key is not None and result["text"]:
+        cache.set(cache_key, result["text"])
+    return result
+
 def format_resume_profile(resume_data: Dict) -> Panel:
     """Format resume data into a rich Panel"""
     content = Text()
@@ -280,30 +494,53 @@ def deduplicate_jobs(jobs: List[tuple[Dict, float]]) -> List[tuple[Dict, float]]
     
     return unique_jobs
 
-def find_matching_jobs(resume_data: Dict, limit: int = 5) -> List[tuple[Dict, float]]:
-    """Find matching jobs based on resume embeddings and return with match scores"""
+def find_matching_jobs(resume_data: Dict, limit: int = 5,
+                       index: Union["JobIndex", None] = None,
+                       filters: Union[Dict, None] = None,
+                       candidate_cap: Union[int, None] = None) -> List[tuple[Dict, float]]:
+    """
+    Find matching jobs based on resume embeddings and return with match scores.
+
+    filters may hold job_types, employment_types and min_salary; they are
+    applied before scoring so the result still has up to `limit` jobs. With an
+    index, candidate_cap limits dense scoring to the best BM25 matches for the
+    resume's skills.
+    """
+    from job_index import job_matches_filters
+
+    filters = filters or {}
     try:
-        jobs_response = supabase.table("jobs") \
-            .select("*") \
-            .execute()
+        # A preloaded index avoids downloading and rescoring the jobs table
+        if index is not None:
+            with timer("similarity_scoring"):
+                return index.search(resume_data.get("embeddings", []), limit,
+                                    skills=resume_data.get("skills"), candidate_cap=candidate_cap,
+                                    **filters)
+
+        with timer("job_fetch"):
+            jobs = get_storage().fetch_rows("jobs")
             
-        if not jobs_response.data:
+        if not jobs:
             return []
 
         matches = []
         resume_embedding = resume_data.get("embeddings", [])
         
-        for job in jobs_response.data:
-            job_embedding = job.get("embeddings", [])
-            if job_embedding and resume_embedding:
-                similarity = calculate_similarity(resume_embedding, job_embedding)
-                matches.append((job, similarity))
-        
-        # Sort by similarity
-        matches.sort(key=lambda x: x[1], reverse=True)
+        with timer("similarity_scoring"):
+            for job in jobs:
+                if filters and not job_matches_filters(job, **filters):
+                    continue
+                job_embedding = job.get("embeddings", [])
+                if job_embedding and resume_embedding:
+                    similarity = calculate_similarity(resume_embedding, job_embedding)
+                    matches.append((job, similarity))
+            
+            # Sort by similarity
+            matches.sort(key=lambda x: x[1], reverse=True)
         
         # Remove duplicates
-        unique_matches = deduplicate_jobs(matches)
+        with timer("dedup"):
+            unique_matches = deduplicate_jobs(matches)
         
         # Return top N unique matches
         return unique_matches[:limit]
@@ -330,7 +567,10 @@ def print_job_matches(resume_data: Dict, matching_jobs: List[tuple[Dict, float]]
         console.print(format_job_match(job, match_score))
         console.print("")  # Add spacing between jobs
 
-def get_job_recommendations(filename: str):
+def get_job_recommendations(filename: str, with_advice: bool = True, stream: bool = True,
+                            cache: Union["LLMResponseCache", None] = None,
+                            match_store: Union["ResumeMatchStore", None] = None,
+                            index: Union["JobIndex", None] = None):
     """Main function to get job recommendations based on resume filename"""
     try:
         # Fetch resume data
@@ -340,15 +580,49 @@ def get_job_recommendations(filename: str):
             console.print("[red]Resume not found[/red]")
             return
             
-        # Find matching jobs with scores and deduplication
-        matching_jobs = find_matching_jobs(resume_data)
+        # Prefer the materialized matches; rank from scratch if they are missing
+        # or too many stored jobs have since been deleted
+        matching_jobs = None
+        if match_store is not None:
+            try:
+                matching_jobs = match_store.lookup(filename, index=index)
+            except Exception as e:
+                print(f"Error reading stored matches: {str(e)}")
+        if not matching_jobs or len(matching_jobs) < 5:
+            # Find matching jobs with scores and deduplication
+            matching_jobs = find_matching_jobs(resume_data, index=index)
         if not matching_jobs:
             console = Console()
             console.print("[red]No matching jobs found[/red]")
             return
             
-        # Print formatted results
+        # Print formatted results before the (slow) LLM call starts
         print_job_matches(resume_data, matching_jobs)
+
+        if not with_advice:
+            return
+
+        console = Console()
+        console.print("\n=== AI CAREER ADVISOR RECOMMENDATIONS ===\n", style="bold white on magenta")
+        if stream:
+            advice = stream_job_recommendations(resume_data, matching_jobs, console=console, cache=cache)
+            if advice["time_to_first_token"] is not None:
+                console.print(
+                    f"[dim]Time to first token: {advice['time_to_first_token']:.2f}s · "
+                    f"Total generation time: {advice['total_time']:.2f}s[/dim]"
+                )
+            if "prompt_tokens_before" in advice:
+                console.print(
+                    f"[dim]Prompt tokens: {advice['prompt_tokens_before']} → "
+                    f"{advice['prompt_tokens_after']} after compaction[/dim]"
+                )
+            return advice
+
+        start = time.perf_counter()
+        text = generate_job_recommendations(resume_data, matching_jobs, cache=cache)
+        elapsed = time.perf_counter() - start
+        console.print(_advice_panel(text, f"[dim]total {elapsed:.2f}s"))
+        return {"text": text, "time_to_first_token": elapsed, "total_time": elapsed, "cached": False}
         
     except Exception as e:
         console = Console()
@@ -0,0 +1,71 @@
+"""
+Scaling benchmark for JobIndex.search(shards=N).
+
+Run from the repository root:
+
+    python -m benchmarks.sharded_search --sizes 20000 100000 --dim 1024 --shards 1 2 4 8
+
+For each corpus size it checks that every shard count returns exactly the
+same matches as single-shard exact search, then prints the median query
+latency and the speedup over shards=1.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from job_index import JobIndex
+
+
+def synthetic_index(size: int, dim: int, seed: int = 0) -> JobIndex:
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((size, dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    rows = [{"id": i, "company_name": f"company-{i % 997}", "job_position": f"position-{i % 31}"}
+            for i in range(size)]
+    return JobIndex.from_arrays(matrix, rows)
+
+
+def time_queries(index: JobIndex, queries: np.ndarray, shards: int, executor) -> float:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, limit=5, shards=shards, executor=executor)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--queries", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    executor = ThreadPoolExecutor(max_workers=max(args.shards))
+    rng = np.random.default_rng(1)
+
+    for size in args.sizes:
+        index = synthetic_index(size, args.dim)
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+        expected = [[job["id"] for job, _ in index.search(q, limit=5)] for q in queries]
+        baseline = None
+        print(f"\ncorpus={size} dim={args.dim}")
+        print(f"{'shards':>6} {'median ms':>10} {'speedup':>8} {'identical':>9}")
+        for shards in args.shards:
+            actual = [[job["id"] for job, _ in index.search(q, limit=5, shards=shards, executor=executor)]
+                      for q in queries]
+            median = time_queries(index, queries, shards, executor)
+            baseline = baseline or median
+            print(f"{shards:>6} {median * 1000:>10.2f} {baseline / median:>7.2f}x {str(actual == expected):>9}")
+
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
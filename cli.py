@@ -0,0 +1,155 @@
+"""
+Command line entry point for the resume/job pipeline.
+
+    python cli.py extract docx --folder Resumes --output resume_data_docx.csv
+    python cli.py ingest
+    python cli.py match Adelina_Erimia_PMP1.docx --limit 5 --job-type "Project Management"
+    python cli.py recommend Adelina_Erimia_PMP1.docx --cache llm_cache.db
+    python cli.py --profile runs/ingest --metrics ingest.prom ingest
+
+Only argparse is imported up front. Each subcommand imports the modules it
+needs when it runs, so `--help` and the cheap subcommands do not pay for
+groq, the storage SDKs or the document parsers.
+
+--profile PREFIX runs the subcommand under cProfile and writes PREFIX.prof
+together with the per-stage histograms (PREFIX.stages.txt, also printed to
+stderr, and PREFIX.metrics.json). --metrics PATH exports the stage timings
+and counters as Prometheus text, or as JSON for a .json path.
+"""
+import argparse
+import os
+import sys
+from typing import List, Union
+
+EXTRACT_DEFAULTS = {
+    "docx": ("Resumes", "resume_data_docx.csv"),
+    "pdf": ("data", "resume_data_pdf.csv"),
+}
+
+
+def run_extract(args: argparse.Namespace) -> int:
+    if args.format == "docx":
+        import docx_files as extractor
+    else:
+        import pdf_files as extractor
+
+    default_folder, default_output = EXTRACT_DEFAULTS[args.format]
+    resumes = extractor.process_resume_folder(args.folder or default_folder, args.output or default_output)
+    print(f"Extracted {len(resumes)} resumes")
+    return 0
+
+
+def run_ingest(args: argparse.Namespace) -> int:
+    import storing_data
+
+    storing_data.main()
+    return 0
+
+
+def _filters(args: argparse.Namespace) -> dict:
+    filters = {}
+    if args.job_type:
+        filters["job_types"] = args.job_type
+    if args.employment_type:
+        filters["employment_types"] = args.employment_type
+    if args.min_salary is not None:
+        filters["min_salary"] = args.min_salary
+    return filters
+
+
+def run_match(args: argparse.Namespace) -> int:
+    import ai_suggesstions
+    from job_index import JobIndex
+    from metrics import timer
+
+    resume_data = ai_suggesstions.fetch_resume_by_filename(args.filename)
+    if not resume_data:
+        print(f"Resume not found: {args.filename}", file=sys.stderr)
+        return 1
+
+    with timer("job_fetch"):
+        index = JobIndex.from_storage(ai_suggesstions.get_storage())
+    matches = ai_suggesstions.find_matching_jobs(resume_data, args.limit, index=index,
+                                                 filters=_filters(args), candidate_cap=args.candidate_cap)
+    ai_suggesstions.print_job_matches(resume_data, matches)
+    return 0 if matches else 1
+
+
+def run_recommend(args: argparse.Namespace) -> int:
+    import ai_suggesstions
+
+    cache = None
+    if args.cache:
+        from llm_cache import LLMResponseCache
+
+        cache = LLMResponseCache(args.cache)
+    match_store = None
+    if not args.no_materialized:
+        from resume_matches import ResumeMatchStore
+
+        match_store = ResumeMatchStore(ai_suggesstions.get_storage())
+    advice = ai_suggesstions.get_job_recommendations(args.filename, stream=not args.no_stream, cache=cache,
+                                                     match_store=match_store)
+    return 0 if advice else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Resume based job recommendation pipeline")
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="PREFIX",
+                        help="Write a cProfile dump and per-stage histograms to PREFIX.* (default: profile)")
+    parser.add_argument("--metrics", metavar="PATH", help="Export stage metrics after the run")
+    parser.add_argument("--metrics-format", choices=("prometheus", "json"),
+                        help="Format for --metrics (default: json for .json paths, else prometheus)")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    extract = subcommands.add_parser("extract", help="Extract resume fields from a folder of files into a CSV")
+    extract.add_argument("format", choices=sorted(EXTRACT_DEFAULTS))
+    extract.add_argument("--folder", help="Folder with the resume files (default: Resumes for docx, data for pdf)")
+    extract.add_argument("--output", help="CSV to write (default: resume_data_<format>.csv)")
+    extract.set_defaults(handler=run_extract)
+
+    ingest = subcommands.add_parser("ingest", help="Embed the jobs dataset and resume CSVs and store them")
+    ingest.set_defaults(handler=run_ingest)
+
+    match = subcommands.add_parser("match", help="Print the best matching jobs for a stored resume")
+    match.add_argument("filename", help="Resume filename as stored in the pdf_files/docx_files tables")
+    match.add_argument("--limit", type=int, default=5)
+    match.add_argument("--job-type", action="append", help="Only this job type (repeatable)")
+    match.add_argument("--employment-type", action="append", help="Only this employment type (repeatable)")
+    match.add_argument("--min-salary", type=float, help="Minimum annual salary")
+    match.add_argument("--candidate-cap", type=int, help="Score only the best N skill matches")
+    match.set_defaults(handler=run_match)
+
+    recommend = subcommands.add_parser("recommend", help="Matching jobs plus AI career advice for a stored resume")
+    recommend.add_argument("filename", help="Resume filename as stored in the pdf_files/docx_files tables")
+    recommend.add_argument("--no-stream", action="store_true", help="Wait for the full answer instead of streaming")
+    recommend.add_argument("--cache", metavar="PATH", help="Reuse LLM answers from this SQLite cache file")
+    recommend.add_argument("--no-materialized", action="store_true",
+                           help="Rank from scratch instead of reading the stored resume_matches top-k")
+    recommend.set_defaults(handler=run_recommend)
+
+    return parser
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.profile and not args.metrics:
+        return args.handler(args)
+
+    from metrics import metrics, profile_run
+
+    try:
+        if args.profile:
+            directory = os.path.dirname(args.profile)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with profile_run(args.profile):
+                return args.handler(args)
+        return args.handler(args)
+    finally:
+        if args.metrics:
+            metrics.write(args.metrics, args.metrics_format)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,10 +6,12 @@
 import os
 import re
 import csv
-from unstructured.documents.elements import Title, Text, NarrativeText
-from unstructured.partition.docx import partition_docx
+
+from metrics import increment, timer
 
 def extract_name(elements):
+    from unstructured.documents.elements import Title, Text
+
     # Check for Title elements (likely candidate for names)
     name_candidates = [elem.text.strip() for elem in elements if isinstance(elem, Title)]
     if name_candidates:
@@ -61,6 +63,10 @@ def extract_resume_info(file_path):
     Returns:
         dict: Extracted resume information
     """
+    # unstructured pulls in the document parsing stack; import it on first use
+    from unstructured.documents.elements import Text, NarrativeText
+    from unstructured.partition.docx import partition_docx
+
     # Default return dictionary
     resume_info = {
         'name': 'N/A',
@@ -72,70 +78,74 @@ def extract_resume_info(file_path):
     
     try:
         # Partition the DOCX file
-        elements = partition_docx(filename=file_path)
+        with timer("partition"):
+            elements = partition_docx(filename=file_path)
         
-        # Extract full text for comprehensive search
-        full_text = " ".join([str(elem) for elem in elements])
+        with timer("section_extraction"):
+            # Extract full text for comprehensive search
+            full_text = " ".join([str(elem) for elem in elements])
         
-        # Extract Name (using improved method)
-        resume_info['name'] = extract_name(elements)
+            # Extract Name (using improved method)
+            resume_info['name'] = extract_name(elements)
         
-        # Extract Gender (using explicit keyword method)
-        resume_info['gender'] = extract_gender(full_text)
+            # Extract Gender (using explicit keyword method)
+            resume_info['gender'] = extract_gender(full_text)
         
-        # Experience Extraction
-        experience_keywords = [
-            'experience', 'worked', 'employment', 'job', 
-            'position', 'professional experience', 'work history'
-        ]
-        experience_sections = [
-            elem for elem in elements 
-            if any(keyword in str(elem).lower() for keyword in experience_keywords)
-        ]
-        experience_texts = [
-            elem.text.strip() 
-            for elem in experience_sections 
-            if (isinstance(elem, (NarrativeText, Text)) and len(elem.text.strip()) > 20)
-        ]
-        resume_info['experience'] = '; '.join(experience_texts) if experience_texts else 'N/A'
+            # Experience Extraction
+            experience_keywords = [
+                'experience', 'worked', 'employment', 'job', 
+                'position', 'professional experience', 'work history'
+            ]
+            experience_sections = [
+                elem for elem in elements 
+                if any(keyword in str(elem).lower() for keyword in experience_keywords)
+            ]
+            experience_texts = [
+                elem.text.strip() 
+                for elem in experience_sections 
+                if (isinstance(elem, (NarrativeText, Text)) and len(elem.text.strip()) > 20)
+            ]
+            resume_info['experience'] = '; '.join(experience_texts) if experience_texts else 'N/A'
         
-        # Education Extraction
-        education_keywords = [
-            'education', 'degree', 'university', 'college', 
-            'school', 'academic background', 'qualification'
-        ]
-        education_sections = [
-            elem for elem in elements 
-            if any(keyword in str(elem).lower() for keyword in education_keywords)
-        ]
-        education_texts = [
-            elem.text.strip() 
-            for elem in education_sections 
-            if (isinstance(elem, (NarrativeText, Text)) and len(elem.text.strip()) > 20)
-        ]
-        resume_info['education'] = '; '.join(education_texts) if education_texts else 'N/A'
+            # Education Extraction
+            education_keywords = [
+                'education', 'degree', 'university', 'college', 
+                'school', 'academic background', 'qualification'
+            ]
+            education_sections = [
+                elem for elem in elements 
+                if any(keyword in str(elem).lower() for keyword in education_keywords)
+            ]
+            education_texts = [
+                elem.text.strip() 
+                for elem in education_sections 
+                if (isinstance(elem, (NarrativeText, Text)) and len(elem.text.strip()) > 20)
+            ]
+            resume_info['education'] = '; '.join(education_texts) if education_texts else 'N/A'
         
-        # Skills Extraction
-        skills_keywords = [
-            'skills', 'technical skills', 'professional skills', 
-            'programming languages', 'tools', 'technologies', 
-            'key skills', 'core competencies'
-        ]
-        skills_sections = [
-            elem for elem in elements 
-            if any(keyword in str(elem).lower() for keyword in skills_keywords)
-        ]
-        skills_list = []
-        for elem in skills_sections:
-            # More comprehensive skill extraction
-            potential_skills = re.findall(r'\b([A-Za-z+#\s]+)(?=,|\n|$)', str(elem))
-            skills_list.extend([skill.strip() for skill in potential_skills if len(skill.strip()) > 2])
+            # Skills Extraction
+            skills_keywords = [
+                'skills', 'technical skills', 'professional skills', 
+                'programming languages', 'tools', 'technologies', 
+                'key skills', 'core competencies'
+            ]
+            skills_sections = [
+                elem for elem in elements 
+                if any(keyword in str(elem).lower() for keyword in skills_keywords)
+            ]
+            skills_list = []
+            for elem in skills_sections:
+                # More comprehensive skill extraction
+                potential_skills = re.findall(r'\b([A-Za-z+#\s]+)(?=,|\n|$)', str(elem))
+                skills_list.extend([skill.strip() for skill in potential_skills if len(skill.strip()) > 2])
         
-        resume_info['skills'] = '; '.join(set(skills_list)) if skills_list else 'N/A'
+            resume_info['skills'] = '; '.join(set(skills_list)) if skills_list else 'N/A'
         
+        increment("resumes_extracted")
         return resume_info
     
     except Exception as e:
+        increment("resume_extraction_errors")
         print(f"Error processing {file_path}: {e}")
         return resume_info
 
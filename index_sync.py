@@ -0,0 +1,121 @@
+import threading
+from typing import Callable, Dict, List, Union
+
+from job_index import JobIndex
+from storage import Storage
+
+
+class JobIndexSync:
+    """
+    Keep a JobIndex current by periodically pulling only the job rows past a
+    high-water mark on `watermark_column` ("id" for append-only inserts, or
+    "updated_at" to also pick up edits).
+
+    Rows whose `deleted_column` is set are tombstoned. Hard deletes cannot be
+    seen through a watermark, so every `reconcile_every` polls the full list
+    of ids is compared against the index. Compaction is kicked off on a
+    background thread whenever the delta segment or tombstones grow too large.
+    """
+
+    def __init__(self, index: JobIndex, storage: Storage, table: str = "jobs",
+                 watermark_column: str = "id", deleted_column: Union[str, None] = None,
+                 interval: float = 30.0, reconcile_every: int = 20,
+                 on_upsert: Union[List[Callable[[List[Dict]], object]], None] = None):
+        self.index = index
+        self.storage = storage
+        self.table = table
+        self.watermark_column = watermark_column
+        self.deleted_column = deleted_column
+        self.interval = interval
+        self.reconcile_every = reconcile_every
+        # Called with each batch of new or changed rows, e.g. ResumeMatchStore.refresh
+        self.on_upsert = on_upsert or []
+        self.watermark = self._initial_watermark()
+        # Ids already applied at exactly the watermark value; the boundary is
+        # re-read with >= on timestamp columns and these must not be re-applied
+        self._applied_at_watermark = self._ids_at(self.index.rows, self.watermark)
+        self.polls = 0
+        self._stop = threading.Event()
+        self._thread: Union[threading.Thread, None] = None
+
+    def _initial_watermark(self):
+        values = [row.get(self.watermark_column) for row in self.index.rows]
+        values = [value for value in values if value is not None]
+        return max(values) if values else None
+
+    def _ids_at(self, rows: List[Dict], value) -> set:
+        if value is None:
+            return set()
+        return {row.get("id") for row in rows if row.get(self.watermark_column) == value}
+
+    def _fetch_changes(self) -> List[Dict]:
+        if self.watermark is None:
+            return self.storage.fetch_rows(self.table, order_by=self.watermark_column)
+        # Timestamps can collide, so re-read the boundary value; upserts are
+        # idempotent. Ids are unique, so strictly greater is enough.
+        if self.watermark_column == "id":
+            return self.storage.fetch_rows(self.table, order_by="id", greater_than=self.watermark)
+        return self.storage.fetch_rows(self.table, order_by=self.watermark_column, at_least=self.watermark)
+
+    def _reconcile_deletes(self) -> int:
+        remote_ids = {row["id"] for row in self.storage.fetch_rows(self.table, columns="id")}
+        missing = [row.get("id") for row in self.index.rows if row.get("id") not in remote_ids]
+        return self.index.delete(missing)
+
+    def poll_once(self) -> Dict:
+        """Apply one round of changes and return what was done"""
+        rows = [row for row in self._fetch_changes()
+                if not (row.get(self.watermark_column) == self.watermark
+                        and row.get("id") in self._applied_at_watermark)]
+        deleted = []
+        changed = []
+        for row in rows:
+            if self.deleted_column and row.get(self.deleted_column):
+                deleted.append(row.get("id"))
+            else:
+                changed.append(row)
+
+        stats = {
+            "upserted": self.index.upsert(changed) if changed else 0,
+            "deleted": self.index.delete(deleted) if deleted else 0,
+            "reconciled": 0,
+        }
+        if rows:
+            watermark = max(row.get(self.watermark_column) for row in rows)
+            applied = self._ids_at(rows, watermark)
+            if watermark == self.watermark:
+                self._applied_at_watermark |= applied
+            else:
+                self.watermark = watermark
+                self._applied_at_watermark = applied
+        if changed:
+            for listener in self.on_upsert:
+                listener(changed)
+
+        self.polls += 1
+        if self.reconcile_every and self.polls % self.reconcile_every == 0:
+            stats["reconciled"] = self._reconcile_deletes()
+
+        if self.index.needs_compaction():
+            self.index.compact_in_background()
+        return stats
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Error syncing job index: {str(e)}")
+
+    def start(self):
+        """Poll in a daemon thread every `interval` seconds"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-index-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,562 @@
+import heapq
+import os
+import re
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+import numpy as np
+from typing import Dict, List, Union
+
+from skill_index import SkillIndex
+
+
+def job_key(job: Dict) -> tuple:
+    """Identity used to deduplicate postings (same company and position)"""
+    return (job.get('company_name'), job.get('job_position'))
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so cosine similarity becomes a dot product"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _split_rows(jobs: List[Dict]) -> tuple[np.ndarray, List[Dict]]:
+    """Separate embeddings from row data; rows without an embedding are skipped"""
+    rows = []
+    vectors = []
+    for job in jobs:
+        embedding = job.get("embeddings")
+        if embedding is None or len(embedding) == 0:
+            continue
+        vectors.append(np.asarray(embedding, dtype=np.float32))
+        rows.append({key: value for key, value in job.items() if key != "embeddings"})
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32), rows
+    return normalize_rows(np.vstack(vectors)).astype(np.float32), rows
+
+
+def _stack(top: np.ndarray, bottom: np.ndarray) -> np.ndarray:
+    if len(top) == 0:
+        return bottom
+    if len(bottom) == 0:
+        return top
+    return np.vstack([top, bottom])
+
+
+def _select_top(scores: np.ndarray, positions: np.ndarray, fetch: int) -> tuple[np.ndarray, bool]:
+    """
+    Indices of the `fetch` best scores ordered by (score desc, position asc).
+    Every score tied with the cut-off is kept, so the selection does not depend
+    on how argpartition breaks ties and sharded results match exact search.
+    """
+    if fetch <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.int64), fetch < len(scores)
+    truncated = fetch < len(scores)
+    if truncated:
+        cutoff = np.partition(scores, len(scores) - fetch)[len(scores) - fetch]
+        candidates = np.flatnonzero(scores >= cutoff)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((positions[candidates], -scores[candidates]))
+    return candidates[order], truncated
+
+
+_executor: Union[ThreadPoolExecutor, None] = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                           thread_name_prefix="job-index-shard")
+        return _executor
+
+
+def normalize_category(value) -> str:
+    """Canonical form for job_type / employment_type values ('Full Time' -> 'full-time')"""
+    if value is None:
+        return ""
+    return re.sub(r"[\s_]+", "-", str(value).strip().lower())
+
+
+# k/m only count as a suffix when no letter follows ('5,000 monthly' is not 5 billion)
+_SALARY_NUMBER = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*([km])?(?![a-z])")
+# Retirement plans mentioned next to the salary ('+ 401k', '403(b)') are not amounts
+_SALARY_NOISE = re.compile(r"\b40[13]\s*\(?[kb]\)?")
+# Whole words only, so 'through' is not 'hr' and 'Monday' is not 'day'
+_SALARY_PERIODS = [
+    (re.compile(r"(?:/\s*|\b)(?:hour|hr|hourly)\b"), 2080),
+    (re.compile(r"(?:/\s*|\b)(?:day|daily)\b"), 260),
+    (re.compile(r"(?:/\s*|\b)(?:week|wk|weekly)\b"), 52),
+    (re.compile(r"(?:/\s*|\b)(?:month|mo|monthly)\b"), 12),
+]
+
+
+def parse_salary_range(salary_range) -> tuple[float, float]:
+    """
+    Parse free-text salary ranges such as '$80,000 - $100,000', '$50k-$70k'
+    or '$25/hour' into annual (min, max). Returns (nan, nan) when unknown.
+    """
+    if salary_range is None:
+        return float("nan"), float("nan")
+    text = _SALARY_NOISE.sub(" ", str(salary_range).lower())
+    values = []
+    for number, suffix in _SALARY_NUMBER.findall(text):
+        value = float(number.replace(",", ""))
+        if suffix == "k":
+            value *= 1000
+        elif suffix == "m":
+            value *= 1000000
+        values.append(value)
+    if not values:
+        return float("nan"), float("nan")
+
+    multiplier = 1
+    for pattern, periods in _SALARY_PERIODS:
+        if pattern.search(text):
+            multiplier = periods
+            break
+    values = [value * multiplier for value in values]
+    return min(values), max(values)
+
+
+class _MetadataIndex:
+    """
+    Prefilter indexes built alongside the vectors: one boolean bitmap per
+    job_type and employment_type value, and parsed annual salary bounds with
+    positions sorted by the upper bound so a salary floor is a binary search.
+    """
+
+    CATEGORY_FIELDS = ("job_type", "employment_type")
+
+    def __init__(self, bitmaps: Dict[str, Dict[str, np.ndarray]], salary_min: np.ndarray,
+                 salary_max: np.ndarray):
+        self.bitmaps = bitmaps
+        self.salary_min = salary_min
+        self.salary_max = salary_max
+        # NaN sorts last, so unknown salaries never pass a floor
+        self.salary_order = np.argsort(salary_max, kind="stable")
+        self.salary_sorted = salary_max[self.salary_order]
+        self.size = len(salary_max)
+
+    @classmethod
+    def build(cls, rows: List[Dict]) -> "_MetadataIndex":
+        bitmaps = {}
+        for field in cls.CATEGORY_FIELDS:
+            values = np.array([normalize_category(row.get(field)) for row in rows], dtype=object)
+            uniques, codes = np.unique(values, return_inverse=True) if len(rows) else ([], values)
+            bitmaps[field] = {
+                value: codes == code
+                for code, value in enumerate(uniques)
+                if value
+            }
+        salaries = np.array([parse_salary_range(row.get("salary_range")) for row in rows],
+                            dtype=np.float32).reshape(len(rows), 2)
+        return cls(bitmaps, salaries[:, 0], salaries[:, 1])
+
+    def extend(self, rows: List[Dict]) -> "_MetadataIndex":
+        """New index covering the existing positions followed by rows"""
+        added = _MetadataIndex.build(rows)
+        bitmaps = {}
+        for field in self.CATEGORY_FIELDS:
+            bitmaps[field] = {}
+            for value in set(self.bitmaps[field]) | set(added.bitmaps[field]):
+                old = self.bitmaps[field].get(value, np.zeros(self.size, dtype=bool))
+                new = added.bitmaps[field].get(value, np.zeros(added.size, dtype=bool))
+                bitmaps[field][value] = np.concatenate([old, new])
+        return _MetadataIndex(bitmaps, np.concatenate([self.salary_min, added.salary_min]),
+                              np.concatenate([self.salary_max, added.salary_max]))
+
+    def _category_mask(self, field: str, values: List[str]) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        for value in values:
+            bitmap = self.bitmaps[field].get(normalize_category(value))
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def mask(self, job_types: Union[List[str], None] = None,
+             employment_types: Union[List[str], None] = None,
+             min_salary: Union[float, None] = None) -> Union[np.ndarray, None]:
+        """Boolean mask of positions passing every filter, or None if no filter is set"""
+        mask = None
+        if job_types:
+            mask = self._category_mask("job_type", job_types)
+        if employment_types:
+            employment = self._category_mask("employment_type", employment_types)
+            mask = employment if mask is None else mask & employment
+        if min_salary is not None:
+            start = np.searchsorted(self.salary_sorted, min_salary, side="left")
+            salary = np.zeros(self.size, dtype=bool)
+            salary[self.salary_order[start:]] = True
+            # The sorted tail also holds NaN (unknown) salaries; drop them
+            salary &= ~np.isnan(self.salary_max)
+            mask = salary if mask is None else mask & salary
+        return mask
+
+
+def job_matches_filters(job: Dict, job_types: Union[List[str], None] = None,
+                        employment_types: Union[List[str], None] = None,
+                        min_salary: Union[float, None] = None) -> bool:
+    """Row-at-a-time equivalent of the prefilter indexes, for unindexed scans"""
+    if job_types and normalize_category(job.get("job_type")) not in {normalize_category(v) for v in job_types}:
+        return False
+    if employment_types and normalize_category(job.get("employment_type")) not in \
+            {normalize_category(v) for v in employment_types}:
+        return False
+    if min_salary is not None:
+        _, salary_max = parse_salary_range(job.get("salary_range"))
+        if np.isnan(salary_max) or salary_max < min_salary:
+            return False
+    return True
+
+
+class _IndexState:
+    """
+    Immutable snapshot of the index. Positions [0, len(base)) live in the base
+    matrix and the rest in the small delta matrix that receives synced rows;
+    replaced or deleted positions are tombstoned in `alive` until compaction.
+    """
+
+    def __init__(self, base: np.ndarray, delta: np.ndarray, rows: List[Dict],
+                 alive: np.ndarray, version: int = 0, meta: Union[_MetadataIndex, None] = None,
+                 skills: Union[SkillIndex, None] = None):
+        self.base = base
+        self.delta = delta
+        self.rows = rows
+        self.alive = alive
+        self.version = version
+        self.meta = meta if meta is not None else _MetadataIndex.build(rows)
+        self.skills = skills if skills is not None else SkillIndex.build(rows)
+        self.position_by_id = {
+            row.get("id"): position
+            for position, row in enumerate(rows)
+            if alive[position] and row.get("id") is not None
+        }
+
+    @property
+    def dead(self) -> int:
+        return int(len(self.alive) - np.count_nonzero(self.alive))
+
+
+def _merge_shards(shard_results: List[tuple[List[tuple[float, int]], bool]]):
+    """
+    Merge per-shard (negated score, position) lists best-first. Stops after the
+    last entry of a truncated shard: its unfetched rows may outrank whatever
+    the other shards yield next, so the caller has to refetch.
+    """
+    tagged = [[(negated, position, truncated and i == len(ranked) - 1)
+               for i, (negated, position) in enumerate(ranked)]
+              for ranked, truncated in shard_results]
+    for negated, position, last in heapq.merge(*tagged):
+        yield -negated, position
+        if last:
+            return
+
+
+class JobIndex:
+    """
+    In-memory job index: one normalized float32 matrix plus the job rows
+    (without their embeddings) so a query is a single matrix-vector product.
+
+    Readers never lock: every query works on the state object it grabbed at
+    the start, and writers (upsert/delete/compact) publish a new state by
+    swapping a single reference.
+    """
+
+    def __init__(self, jobs: List[Dict]):
+        self._write_lock = threading.Lock()
+        self._compaction_thread: Union[threading.Thread, None] = None
+        self.reset(*_split_rows(jobs))
+
+    @classmethod
+    def from_storage(cls, storage, table: str = "jobs") -> "JobIndex":
+        """Load every job with an embedding through a storage backend's bulk vector read"""
+        rows, matrix = storage.fetch_vectors(table)
+        if len(rows) == 0:
+            return cls([])
+        return cls.from_arrays(normalize_rows(matrix).astype(np.float32), rows)
+
+    @classmethod
+    def from_arrays(cls, matrix: np.ndarray, rows: List[Dict]) -> "JobIndex":
+        """
+        Build an index from an already-normalized matrix (e.g. a read-only
+        np.memmap) without copying it.
+        """
+        index = cls([])
+        index.reset(matrix, rows)
+        return index
+
+    def reset(self, matrix: np.ndarray, rows: List[Dict]):
+        """Atomically replace the whole index contents"""
+        if len(matrix) != len(rows):
+            raise ValueError(f"Matrix has {len(matrix)} vectors but {len(rows)} rows were given")
+        empty_delta = np.zeros((0, matrix.shape[1] if matrix.ndim == 2 else 0), dtype=np.float32)
+        with self._write_lock:
+            version = self._state.version + 1 if hasattr(self, "_state") else 0
+            self._state = _IndexState(matrix, empty_delta, list(rows), np.ones(len(rows), dtype=bool), version)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._state.alive))
+
+    def get(self, job_id) -> Union[Dict, None]:
+        """Live row for job_id, or None if it is unknown or tombstoned"""
+        state = self._state
+        position = state.position_by_id.get(job_id)
+        return None if position is None else state.rows[position]
+
+    @property
+    def rows(self) -> List[Dict]:
+        """Live rows, in index order"""
+        state = self._state
+        return [row for row, alive in zip(state.rows, state.alive) if alive]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Live vectors, aligned with `rows`"""
+        state = self._state
+        return _stack(state.base, state.delta)[state.alive]
+
+    def _query(self, embedding: List[float]) -> Union[np.ndarray, None]:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return None if norm == 0 else query / norm
+
+    def scores(self, embedding: List[float], state: Union[_IndexState, None] = None) -> np.ndarray:
+        """
+        Cosine similarity of the query against every position in the state;
+        tombstoned positions score -inf.
+        """
+        state = state or self._state
+        query = self._query(embedding)
+        if len(state.rows) == 0 or query is None:
+            return np.full(len(state.rows), -np.inf, dtype=np.float32)
+        scores = state.base @ query if len(state.base) else np.zeros(0, dtype=np.float32)
+        if len(state.delta):
+            scores = np.concatenate([scores, state.delta @ query])
+        if state.dead:
+            scores[~state.alive] = -np.inf
+        return scores
+
+    def search(self, embedding: List[float], limit: int = 5, dedupe: bool = True,
+               shards: int = 1, executor: Union[Executor, None] = None,
+               job_types: Union[List[str], None] = None,
+               employment_types: Union[List[str], None] = None,
+               min_salary: Union[float, None] = None,
+               skills=None, candidate_cap: Union[int, None] = None,
+               fusion_weight: float = 0.0) -> List[tuple[Dict, float]]:
+        """
+        Return the top `limit` (job, score) pairs, deduplicated like find_matching_jobs.
+
+        job_types, employment_types (any of the listed values) and min_salary
+        (annual upper bound of the posted range) are applied as masks from the
+        metadata indexes before scoring, so only matching vectors are scored.
+
+        With skills and candidate_cap, BM25 over the skill inverted index picks
+        at most candidate_cap jobs and only those are dense-scored. fusion_weight
+        blends in the max-normalized BM25 score (0 ranks purely by cosine). If
+        the candidates yield fewer than `limit` jobs after dedup (including when
+        no job shares a skill token), the search falls back to dense scoring.
+
+        With shards > 1 the base matrix is split into that many row ranges that
+        are scored in parallel on executor (a shared thread pool by default;
+        numpy releases the GIL during the product) and the per-shard top-k
+        lists are heap-merged. The result is identical to shards=1.
+        """
+        state = self._state
+        if embedding is None or len(embedding) == 0 or len(state.rows) == 0 or limit <= 0:
+            return []
+
+        mask = state.meta.mask(job_types, employment_types, min_salary)
+        if skills and candidate_cap:
+            positions, lexical = state.skills.candidates(skills, candidate_cap, state.alive, mask)
+            if len(positions):
+                results = self._lexical_search(state, embedding, positions, lexical, limit, dedupe,
+                                               fusion_weight)
+                # Too few jobs share a skill token: rank by dense scores instead
+                if len(results) >= limit:
+                    return results
+        if mask is not None:
+            return self._filtered_search(state, embedding, mask, limit, dedupe)
+        if shards > 1:
+            return self._sharded_search(state, embedding, limit, dedupe, shards, executor)
+        scores = self.scores(embedding, state)
+        return self._top_k(state, scores, np.arange(len(scores)), limit, dedupe)
+
+    def _score_positions(self, state: _IndexState, query: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Dense scores for sorted positions only, gathering rows from base and delta"""
+        base_len = len(state.base)
+        split = np.searchsorted(positions, base_len)
+        scores = np.empty(len(positions), dtype=np.float32)
+        if split:
+            scores[:split] = state.base[positions[:split]] @ query
+        if split < len(positions):
+            scores[split:] = state.delta[positions[split:] - base_len] @ query
+        return scores
+
+    def _filtered_search(self, state: _IndexState, embedding: List[float], mask: np.ndarray,
+                         limit: int, dedupe: bool) -> List[tuple[Dict, float]]:
+        query = self._query(embedding)
+        positions = np.flatnonzero(mask & state.alive)
+        if query is None or len(positions) == 0:
+            return []
+        return self._top_k(state, self._score_positions(state, query, positions), positions, limit, dedupe)
+
+    def _lexical_search(self, state: _IndexState, embedding: List[float], positions: np.ndarray,
+                        lexical: np.ndarray, limit: int, dedupe: bool,
+                        fusion_weight: float) -> List[tuple[Dict, float]]:
+        query = self._query(embedding)
+        if query is None:
+            return []
+        scores = self._score_positions(state, query, positions)
+        if fusion_weight:
+            scores = (1.0 - fusion_weight) * scores + fusion_weight * (lexical / lexical.max())
+        return self._top_k(state, scores.astype(np.float32), positions, limit, dedupe)
+
+    def _collect(self, state: _IndexState, ranked, limit: int,
+                 dedupe: bool) -> tuple[List[tuple[Dict, float]], bool]:
+        """Walk (score, position) pairs best-first; True once `limit` results were found"""
+        results = []
+        seen = set()
+        for score, position in ranked:
+            if score == -np.inf:
+                break
+            job = state.rows[position]
+            if dedupe:
+                key = job_key(job)
+                if key in seen:
+                    continue
+                seen.add(key)
+            results.append((job, float(score)))
+            if len(results) == limit:
+                return results, True
+        return results, False
+
+    def _top_k(self, state: _IndexState, scores: np.ndarray, positions: np.ndarray, limit: int,
+               dedupe: bool) -> List[tuple[Dict, float]]:
+        # Over-fetch so duplicates can be dropped without a full sort; fall back
+        # to sorting everything if too many of the candidates were duplicates
+        fetch = limit * 4 if dedupe else limit
+        while True:
+            candidates, truncated = _select_top(scores, positions, fetch)
+            results, complete = self._collect(
+                state, zip(scores[candidates].tolist(), positions[candidates].tolist()), limit, dedupe)
+            if complete or not truncated:
+                return results
+            fetch = len(scores)
+
+    def _shard_top(self, state: _IndexState, query: np.ndarray, start: int, stop: int,
+                   fetch: int) -> tuple[List[tuple[float, int]], bool]:
+        base_len = len(state.base)
+        if start < base_len:
+            scores = state.base[start:stop] @ query
+        else:
+            scores = state.delta[start - base_len:stop - base_len] @ query
+        alive = state.alive[start:stop]
+        if not alive.all():
+            scores[~alive] = -np.inf
+        positions = np.arange(start, stop)
+        candidates, truncated = _select_top(scores, positions, fetch)
+        # Negated scores so heapq.merge yields best-first, ties by position
+        ranked = list(zip((-scores[candidates]).tolist(), positions[candidates].tolist()))
+        return ranked, truncated
+
+    def _sharded_search(self, state: _IndexState, embedding: List[float], limit: int, dedupe: bool,
+                        shards: int, executor: Union[Executor, None]) -> List[tuple[Dict, float]]:
+        query = self._query(embedding)
+        if query is None:
+            return []
+        executor = executor or _default_executor()
+
+        # Shards never straddle the base/delta boundary; the delta is its own shard
+        base_len = len(state.base)
+        bounds = np.linspace(0, base_len, min(shards, max(base_len, 1)) + 1).astype(int)
+        ranges = [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        if len(state.delta):
+            ranges.append((base_len, base_len + len(state.delta)))
+
+        fetch = limit * 4 if dedupe else limit
+        while True:
+            shard_results = list(executor.map(
+                lambda bound: self._shard_top(state, query, bound[0], bound[1], fetch), ranges))
+            results, complete = self._collect(state, _merge_shards(shard_results), limit, dedupe)
+            if complete or not any(truncated for _, truncated in shard_results):
+                return results
+            fetch = len(state.rows)
+
+    def upsert(self, jobs: List[Dict]) -> int:
+        """
+        Add new job rows or replace existing ones (matched on id). Old versions
+        are tombstoned and the new vectors appended to the delta segment.
+        """
+        vectors, rows = _split_rows(jobs)
+        if not rows:
+            return 0
+        with self._write_lock:
+            state = self._state
+            alive = np.concatenate([state.alive, np.ones(len(rows), dtype=bool)])
+            latest = {}
+            for offset, row in enumerate(rows):
+                position = state.position_by_id.get(row.get("id"))
+                if position is not None:
+                    alive[position] = False
+                # Within one batch the last version of a row wins
+                previous = latest.get(row.get("id"))
+                if previous is not None:
+                    alive[len(state.rows) + previous] = False
+                if row.get("id") is not None:
+                    latest[row.get("id")] = offset
+            self._state = _IndexState(state.base, _stack(state.delta, vectors), state.rows + rows,
+                                      alive, state.version + 1, state.meta.extend(rows),
+                                      state.skills.extend(rows))
+        return len(rows)
+
+    def delete(self, job_ids: List) -> int:
+        """Tombstone the given job ids; space is reclaimed by compact()"""
+        with self._write_lock:
+            state = self._state
+            positions = [state.position_by_id[job_id] for job_id in job_ids if job_id in state.position_by_id]
+            if not positions:
+                return 0
+            alive = state.alive.copy()
+            alive[positions] = False
+            self._state = _IndexState(state.base, state.delta, state.rows, alive, state.version + 1,
+                                      state.meta, state.skills)
+        return len(positions)
+
+    def needs_compaction(self, max_delta_fraction: float = 0.1, max_dead_fraction: float = 0.1) -> bool:
+        state = self._state
+        total = max(len(state.rows), 1)
+        return len(state.delta) / total > max_delta_fraction or state.dead / total > max_dead_fraction
+
+    def compact(self) -> bool:
+        """
+        Fold the delta segment into the base and drop tombstoned rows. The new
+        matrix is built without holding the write lock; if a writer got in
+        first the work is discarded and False is returned so it can be retried.
+        """
+        state = self._state
+        if len(state.delta) == 0 and state.dead == 0:
+            return True
+        base = _stack(state.base, state.delta)[state.alive]
+        rows = [row for row, alive in zip(state.rows, state.alive) if alive]
+        compacted = _IndexState(base, np.zeros((0, base.shape[1] if base.size else 0), dtype=np.float32),
+                                rows, np.ones(len(rows), dtype=bool), state.version + 1)
+        with self._write_lock:
+            if self._state is not state:
+                return False
+            self._state = compacted
+        return True
+
+    def compact_in_background(self) -> bool:
+        """Start compaction on a daemon thread unless one is already running"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return False
+        self._compaction_thread = threading.Thread(target=self.compact, name="job-index-compaction",
+                                                   daemon=True)
+        self._compaction_thread.start()
+        return True
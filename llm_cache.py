@@ -0,0 +1,186 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+
+def make_cache_key(resume_data: Dict, job_ids: List, model: str,
+                   prompt_version: str, params: Dict) -> str:
+    """
+    Build a stable cache key from everything that influences the LLM output
+    """
+    payload = {
+        "resume": {
+            field: resume_data.get(field)
+            for field in ("education", "skills", "experience")
+        },
+        # Order matters: the prompt lists the jobs in ranking order
+        "job_ids": [str(job_id) for job_id in job_ids],
+        "model": model,
+        "prompt_version": prompt_version,
+        "params": params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Persistent SQLite cache for LLM completions with TTL and LRU size eviction
+    """
+
+    def __init__(self, path: str = "llm_cache.db", ttl_seconds: Optional[float] = 7 * 24 * 3600,
+                 max_entries: int = 10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_accessed "
+            "ON llm_responses (last_accessed)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_responses SET last_accessed = ? WHERE key = ?",
+                (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def set(self, key: str, response: str):
+        """Store a response and evict expired and least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?",
+                (now - self.ttl_seconds,)
+            )
+
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM llm_responses ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class StubRateLimitError(Exception):
+    """Mimics an HTTP 429 from the provider, including the retry-after header"""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after}s")
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after": str(retry_after)})
+
+
+class StubLLMClient:
+    """
+    Offline stand-in for the Groq client exposing chat.completions.create
+    """
+
+    def __init__(self, response: str = "Stub career recommendations.", latency: float = 0.0,
+                 token_latency: float = 0.0, rate_limit_every: int = 0, retry_after: float = 0.1):
+        self.response = response
+        self.latency = latency
+        self.token_latency = token_latency
+        # Every Nth call raises StubRateLimitError; 0 disables it
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, stream: bool = False, **kwargs):
+        with self._lock:
+            self.calls.append(dict(kwargs, stream=stream))
+            call_number = len(self.calls)
+        if self.rate_limit_every and call_number % self.rate_limit_every == 0:
+            raise StubRateLimitError(self.retry_after)
+        if self.latency:
+            time.sleep(self.latency)
+        if stream:
+            return self._stream()
+        message = SimpleNamespace(role="assistant", content=self.response)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in kwargs.get("messages", [])) // 4
+        completion_tokens = len(self.response) // 4
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                               usage=usage)
+
+    def _stream(self):
+        # Mimic OpenAI-style chunks: one delta per whitespace-separated token
+        tokens = self.response.split(" ")
+        for idx, token in enumerate(tokens):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            content = token if idx == 0 else " " + token
+            delta = SimpleNamespace(role="assistant" if idx == 0 else None, content=content)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(role=None, content=None),
+                                                       finish_reason="stop")])
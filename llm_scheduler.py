@@ -0,0 +1,162 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from prompt_builder import estimate_tokens
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """Block until amount tokens are available, then take them"""
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+
+    def refund(self, amount: float):
+        """Return unused tokens, e.g. when the real usage was below the estimate"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedScheduler:
+    """
+    Run many chat completions concurrently under requests-per-minute and
+    tokens-per-minute budgets, retrying 429s after the server's retry-after.
+    """
+
+    def __init__(self, client, requests_per_minute: float = 30, tokens_per_minute: float = 6000,
+                 max_workers: int = 8, max_retries: int = 5, backoff_seconds: float = 1.0):
+        self.client = client
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.stats = {"requests": 0, "rate_limited": 0, "failed": 0}
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _estimate_tokens(self, request: Dict) -> int:
+        prompt = "".join(str(message.get("content", "")) for message in request.get("messages", []))
+        return estimate_tokens(prompt) + int(request.get("max_tokens", 0))
+
+    def _wait_for_pause(self):
+        # A 429 on any worker pauses all of them until the retry-after elapses
+        while True:
+            with self._lock:
+                wait = self._paused_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _run_one(self, request: Dict):
+        estimate = self._estimate_tokens(request)
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_pause()
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(estimate)
+            with self._lock:
+                self.stats["requests"] += 1
+            try:
+                completion = self.client.chat.completions.create(**request)
+            except Exception as e:
+                if not _is_rate_limit_error(e):
+                    raise
+                # A rejected request consumed none of the provider's token budget
+                self.token_bucket.refund(estimate)
+                with self._lock:
+                    self.stats["rate_limited"] += 1
+                if attempt == self.max_retries:
+                    raise
+                retry_after = _retry_after_seconds(e)
+                if retry_after is None:
+                    retry_after = self.backoff_seconds * (2 ** attempt)
+                self._pause(retry_after)
+                continue
+
+            usage = getattr(completion, "usage", None)
+            used = getattr(usage, "total_tokens", None)
+            if used is not None and used < estimate:
+                self.token_bucket.refund(estimate - used)
+            return completion
+
+    def run(self, requests: List[Dict], on_result: Optional[Callable[[int, object], None]] = None) -> List:
+        """
+        Execute requests (kwargs for chat.completions.create) and return the
+        completions, or the raised exception, in input order. on_result is
+        called in input order as soon as each prefix of results is complete.
+        """
+        results: List = [None] * len(requests)
+        done = [False] * len(requests)
+        next_index = [0]
+        emit_lock = threading.Lock()
+
+        def finish(index: int, value):
+            with emit_lock:
+                results[index] = value
+                done[index] = True
+                while next_index[0] < len(requests) and done[next_index[0]]:
+                    if on_result is not None:
+                        on_result(next_index[0], results[next_index[0]])
+                    next_index[0] += 1
+
+        def task(index: int):
+            try:
+                value = self._run_one(requests[index])
+            except Exception as e:
+                with self._lock:
+                    self.stats["failed"] += 1
+                value = e
+            finish(index, value)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(task, range(len(requests))))
+        return results
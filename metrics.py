@@ -0,0 +1,198 @@
+import cProfile
+import json
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Union
+
+# Upper bounds in seconds, from a fast in-memory stage up to a slow LLM answer
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = "resume_pipeline"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (counts per bucket, plus sum/min/max)"""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        # First bucket whose upper bound is >= seconds (Prometheus "le")
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation, capped at max"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "mean_seconds": round(self.sum / self.count, 6) if self.count else 0.0,
+            "min_seconds": round(self.min, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of per-stage timings and named counters for the
+    pipeline. Stages are timed with `timer("embedding")` (a context manager)
+    or `@timed("embedding")`; counters are bumped with `increment`. A timed
+    block that raises is recorded under "<stage>_error" instead, so slow
+    failures such as connection timeouts do not skew the stage's histogram.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(f"{stage}_error", time.perf_counter() - start)
+            raise
+        self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str):
+        """Decorator form of timer"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "stages": {stage: histogram.to_dict() for stage, histogram in sorted(self._stages.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            for counter, value in sorted(self._counters.items()):
+                metric = f"{METRIC_PREFIX}_{counter}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def format_histograms(self) -> str:
+        """Plain-text table of per-stage timings and bucket counts, for --profile"""
+        snapshot = self.snapshot()
+        lines = [f"{'stage':<22}{'count':>8}{'total s':>11}{'mean ms':>10}{'p50 ms':>10}"
+                 f"{'p95 ms':>10}{'max ms':>10}"]
+        for stage, stats in snapshot["stages"].items():
+            lines.append(
+                f"{stage:<22}{stats['count']:>8}{stats['sum_seconds']:>11.3f}"
+                f"{stats['mean_seconds'] * 1000:>10.2f}{stats['p50_seconds'] * 1000:>10.2f}"
+                f"{stats['p95_seconds'] * 1000:>10.2f}{stats['max_seconds'] * 1000:>10.2f}"
+            )
+            filled = [(bound, count) for bound, count in stats["buckets"].items() if count]
+            lines.append("    " + "  ".join(f"<={bound}s:{count}" for bound, count in filled))
+        if snapshot["counters"]:
+            lines.append("")
+            lines.extend(f"{counter:<32}{value:>10g}" for counter, value in snapshot["counters"].items())
+        return "\n".join(lines)
+
+    def write(self, path: str, fmt: Union[str, None] = None):
+        """Write metrics to path as 'prometheus' or 'json' (default: by extension)"""
+        fmt = fmt or ("json" if path.endswith(".json") else "prometheus")
+        if fmt not in ("json", "prometheus"):
+            raise ValueError(f"Unknown metrics format: {fmt}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json() if fmt == "json" else self.to_prometheus())
+
+
+# Process-wide registry used by the pipeline modules
+metrics = Metrics()
+timer = metrics.timer
+timed = metrics.timed
+increment = metrics.increment
+
+
+@contextmanager
+def profile_run(prefix: str = "profile", stream=None):
+    """
+    Profile the enclosed block: writes a cProfile dump to <prefix>.prof and
+    the per-stage histograms to <prefix>.stages.txt and <prefix>.metrics.json,
+    and prints the histogram table to stream (stderr by default).
+    """
+    stream = stream or sys.stderr
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{prefix}.prof")
+        table = metrics.format_histograms()
+        with open(f"{prefix}.stages.txt", "w", encoding="utf-8") as f:
+            f.write(table + "\n")
+        metrics.write(f"{prefix}.metrics.json", "json")
+        print(f"\n{table}\n\ncProfile written to {prefix}.prof "
+              f"(inspect with: python -m pstats {prefix}.prof)", file=stream)
+
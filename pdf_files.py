@@ -1,10 +1,12 @@
 import os
 import re
 import csv
-from unstructured.documents.elements import Title, Text, NarrativeText, ListItem
-from unstructured.partition.auto import partition
+
+from metrics import increment, timer
 
 def extract_job_title(elements):
+    from unstructured.documents.elements import Title, Text
+
      # Check for Title elements (likely candidate for names)
     name_candidates = [elem.text.strip() for elem in elements if isinstance(elem, Title)]
     if name_candidates:
@@ -24,6 +26,8 @@ def extract_experience(elements):
     """
     Enhanced experience extraction with debugging.
     """
+    from unstructured.documents.elements import Title, Text, NarrativeText, ListItem
+
     experience_texts = []
     in_experience_section = False
     experience_keywords = [
@@ -55,6 +59,8 @@ def extract_education(elements):
     """
     Enhanced education extraction with debugging.
     """
+    from unstructured.documents.elements import Title, Text, NarrativeText, ListItem
+
     education_texts = []
     in_education_section = False
     education_keywords = [
@@ -85,6 +91,8 @@ def extract_skills(elements):
     """
     Enhanced skills extraction with debugging.
     """
+    from unstructured.documents.elements import Title, Text, NarrativeText, ListItem
+
     skills_texts = []
     in_skills_section = False
     skills_keywords = [
@@ -117,6 +125,9 @@ def extract_resume_info(file_path):
     """
     Extract key information from a PDF resume file with enhanced debugging.
     """
+    # partition.auto loads the parsers for every file type; defer it until a file is read
+    from unstructured.partition.auto import partition
+
     resume_info = {
         'job_title': 'N/A',
         'gender': 'N/A',
@@ -126,28 +137,32 @@ def extract_resume_info(file_path):
     }
     
     try:
-        elements = partition(filename=file_path)
-
-        # Extract details
-        resume_info['job_title'] = extract_job_title(elements)
-        resume_info['experience'] = extract_experience(elements)
-        resume_info['education'] = extract_education(elements)
-        resume_info['skills'] = extract_skills(elements)
-
-        # Gender extraction
-        full_text = " ".join([str(elem) for elem in elements]).lower()
-        gender_keywords = {
-            'male': ['gender: male', 'sex: male', 'male gender', 'gender male'],
-            'female': ['gender: female', 'sex: female', 'female gender', 'gender female']
-        }
-        for gender, keywords in gender_keywords.items():
-            if any(keyword in full_text for keyword in keywords):
-                resume_info['gender'] = gender
-                break
+        with timer("partition"):
+            elements = partition(filename=file_path)
+
+        with timer("section_extraction"):
+            # Extract details
+            resume_info['job_title'] = extract_job_title(elements)
+            resume_info['experience'] = extract_experience(elements)
+            resume_info['education'] = extract_education(elements)
+            resume_info['skills'] = extract_skills(elements)
+
+            # Gender extraction
+            full_text = " ".join([str(elem) for elem in elements]).lower()
+            gender_keywords = {
+                'male': ['gender: male', 'sex: male', 'male gender', 'gender male'],
+                'female': ['gender: female', 'sex: female', 'female gender', 'gender female']
+            }
+            for gender, keywords in gender_keywords.items():
+                if any(keyword in full_text for keyword in keywords):
+                    resume_info['gender'] = gender
+                    break
 
+        increment("resumes_extracted")
         return resume_info
     
     except Exception as e:
+        increment("resume_extraction_errors")
         print(f"Error processing {file_path}: {e}")
         import traceback
         traceback.print_exc()
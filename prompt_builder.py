@@ -0,0 +1,162 @@
+import re
+from typing import Dict, List, Tuple
+
+# Rough average for English text with the Mixtral/Llama tokenizers; we only
+# need a stable estimate to enforce a budget, not an exact count
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 1500
+EMPTY_VALUES = {"", "n/a", "none", "nan", "not specified"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _is_empty(value) -> bool:
+    return value is None or str(value).strip().lower() in EMPTY_VALUES
+
+
+def _split_items(text: str) -> List[str]:
+    """Split extractor output ('; ' joined segments) or lists into unique items"""
+    if _is_empty(text):
+        return []
+    if isinstance(text, (list, tuple)):
+        parts = [str(part) for part in text]
+    else:
+        parts = re.split(r"[;\n|•]+", str(text))
+
+    seen = set()
+    items = []
+    for part in parts:
+        item = " ".join(part.split()).strip(" ,.-")
+        key = item.lower()
+        if item and key not in seen and key not in EMPTY_VALUES:
+            seen.add(key)
+            items.append(item)
+    return items
+
+
+def dedupe_skills(skills) -> List[str]:
+    """Deduplicate skills case-insensitively, splitting on commas as well"""
+    if _is_empty(skills):
+        return []
+    if not isinstance(skills, (list, tuple)):
+        skills = re.split(r"[;,\n|•]+", str(skills))
+    return _split_items(list(skills))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, preferring item and word boundaries"""
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars - 1]
+    for separator in ("; ", ", ", ". ", " "):
+        boundary = cut.rfind(separator)
+        if boundary > max_chars // 2:
+            cut = cut[:boundary]
+            break
+    return cut.rstrip(" ,;.") + "…"
+
+
+def render_raw_context(resume_data: Dict, jobs: List[Dict]) -> str:
+    """The original uncompacted prompt: full fields plus a repr of the job dicts"""
+    return f"""
+        Candidate Profile:
+        Education: {resume_data.get('education', 'Not specified')}
+        Skills: {resume_data.get('skills', 'Not specified')}
+        Experience: {resume_data.get('experience', 'Not specified')}
+
+        Top Matching Jobs:
+        {[{
+            'position': job.get('job_position'),
+            'company': job.get('company_name'),
+            'requirements': job.get('required_qualifications'),
+            'responsibilities': job.get('job_responsibilities')
+        } for job in jobs]}
+        """
+
+
+def _sections(resume_data: Dict, jobs: List[Dict]) -> List[Dict]:
+    """
+    Collect prompt sections with their priority (lower number = kept longer)
+    and the minimum number of tokens to keep before dropping them entirely.
+    """
+    sections = [
+        {"key": "skills", "label": "Skills", "priority": 0, "min_tokens": 40,
+         "text": ", ".join(dedupe_skills(resume_data.get("skills")))},
+        {"key": "experience", "label": "Experience", "priority": 1, "min_tokens": 60,
+         "text": "; ".join(_split_items(resume_data.get("experience")))},
+        {"key": "education", "label": "Education", "priority": 3, "min_tokens": 20,
+         "text": "; ".join(_split_items(resume_data.get("education")))},
+    ]
+    for idx, job in enumerate(jobs, 1):
+        sections.append({"key": f"job{idx}.requirements", "label": "Requirements", "job": idx,
+                         "priority": 2, "min_tokens": 25,
+                         "text": "; ".join(_split_items(job.get("required_qualifications")))})
+        sections.append({"key": f"job{idx}.responsibilities", "label": "Responsibilities", "job": idx,
+                         "priority": 4, "min_tokens": 15,
+                         "text": "; ".join(_split_items(job.get("job_responsibilities")))})
+    return sections
+
+
+def _render(jobs: List[Dict], sections: List[Dict]) -> str:
+    lines = ["CANDIDATE"]
+    for section in sections:
+        if "job" not in section and section["text"]:
+            lines.append(f"{section['label']}: {section['text']}")
+
+    lines.append("")
+    lines.append("TOP MATCHING JOBS")
+    for idx, job in enumerate(jobs, 1):
+        position = job.get("job_position") or "Unknown position"
+        company = job.get("company_name") or "Unknown company"
+        lines.append(f"{idx}. {position} @ {company}")
+        for section in sections:
+            if section.get("job") == idx and section["text"]:
+                lines.append(f"   {section['label']}: {section['text']}")
+    return "\n".join(lines)
+
+
+def build_resume_context(resume_data: Dict, jobs: List[Dict],
+                         token_budget: int = DEFAULT_TOKEN_BUDGET) -> Tuple[str, Dict]:
+    """
+    Build a compact prompt context that fits within token_budget.
+
+    Fields are deduplicated first; if the result is still over budget the
+    lowest-priority sections are truncated down to their minimum size, and
+    dropped entirely only as a last resort. Returns the context and a stats
+    dict with token counts before and after compaction.
+    """
+    sections = _sections(resume_data, jobs)
+    context = _render(jobs, sections)
+    truncated = []
+
+    # First pass shrinks sections to their minimum, second pass drops them
+    for floor_key in ("min_tokens", None):
+        for section in sorted(sections, key=lambda s: -s["priority"]):
+            overflow = estimate_tokens(context) - token_budget
+            if overflow <= 0:
+                break
+            current = estimate_tokens(section["text"])
+            floor = section[floor_key] if floor_key else 0
+            if current <= floor:
+                continue
+            section["text"] = truncate_to_tokens(section["text"], max(floor, current - overflow))
+            if section["key"] not in truncated:
+                truncated.append(section["key"])
+            context = _render(jobs, sections)
+
+    stats = {
+        "tokens_before": estimate_tokens(render_raw_context(resume_data, jobs)),
+        "tokens_after": estimate_tokens(context),
+        "token_budget": token_budget,
+        "truncated": truncated,
+    }
+    return context, stats
@@ -0,0 +1,161 @@
+import time
+from typing import Dict, List, Union
+
+import numpy as np
+
+from job_index import JobIndex, _split_rows, job_key
+from storage import Storage
+
+
+def resume_key(resume_data: Dict) -> str:
+    """Key of a resume in the resume_matches table (filename, as used for lookups)"""
+    return resume_data.get("filename")
+
+
+class ResumeMatchStore:
+    """
+    Materialized top-k job matches per resume in the `resume_matches` table
+    (resume_key, job_ids, scores, updated_at), so a repeated lookup is one
+    keyed read instead of a full ranking.
+
+    The store keeps k raw (not deduplicated) matches, which leaves headroom
+    for duplicate postings and deleted jobs to be skipped at read time. New
+    or changed jobs are merged in by refresh(), which scores only the new job
+    vectors against all resume vectors.
+
+    SQLite creates the table on first write; on Supabase create it first:
+
+        create table resume_matches (
+            id bigserial primary key,
+            resume_key text unique not null,
+            job_ids jsonb,
+            scores jsonb,
+            updated_at timestamptz
+        );
+    """
+
+    def __init__(self, storage: Storage, table: str = "resume_matches", k: int = 20, batch_size: int = 500):
+        self.storage = storage
+        self.table = table
+        self.k = k
+        self.batch_size = batch_size
+        self.keys: List[str] = []
+        self.resume_matrix = np.zeros((0, 0), dtype=np.float32)
+        self.top: Dict[str, List[tuple]] = {}
+
+    def _set_resumes(self, resumes: List[Dict]):
+        matrix, rows = _split_rows(resumes)
+        self.keys = [resume_key(row) for row in rows]
+        self.resume_matrix = matrix
+
+    def _write(self, keys: List[str]):
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        records = [{
+            "resume_key": key,
+            "job_ids": [job_id for job_id, _ in self.top[key]],
+            "scores": [score for _, score in self.top[key]],
+            "updated_at": now,
+        } for key in keys]
+        for start in range(0, len(records), self.batch_size):
+            self.storage.upsert(self.table, records[start:start + self.batch_size], on_conflict="resume_key")
+
+    def materialize(self, resumes: List[Dict], index: JobIndex) -> int:
+        """Compute and store the full top-k for every resume (initial build)"""
+        self._set_resumes(resumes)
+        matrix = index.matrix
+        rows = index.rows
+        job_ids = np.array([row.get("id") for row in rows], dtype=object)
+        for start in range(0, len(self.keys), self.batch_size):
+            scores = self.resume_matrix[start:start + self.batch_size] @ matrix.T
+            k = min(self.k, scores.shape[1])
+            for offset, row_scores in enumerate(scores):
+                best = np.argpartition(-row_scores, k - 1)[:k] if k < len(row_scores) else np.arange(len(row_scores))
+                best = best[np.argsort(-row_scores[best], kind="stable")]
+                self.top[self.keys[start + offset]] = list(zip(job_ids[best].tolist(),
+                                                               row_scores[best].tolist()))
+        self._write(self.keys)
+        return len(self.keys)
+
+    def load(self, resumes: List[Dict]):
+        """Restore the in-memory state from the table after a restart"""
+        self._set_resumes(resumes)
+        wanted = set(self.keys)
+        for row in self.storage.fetch_rows(self.table, columns="resume_key,job_ids,scores",
+                                           order_by="resume_key"):
+            if row["resume_key"] in wanted:
+                self.top[row["resume_key"]] = list(zip(row["job_ids"], row["scores"]))
+
+    def refresh(self, jobs: List[Dict]) -> int:
+        """
+        Merge new or updated jobs into every stored top-k by scoring only the
+        new vectors against all resumes. Returns the number of rows rewritten.
+        """
+        matrix, rows = _split_rows(jobs)
+        if not rows or not self.keys:
+            return 0
+        new_ids = [row.get("id") for row in rows]
+        replaced = set(new_ids)
+        scores = self.resume_matrix @ matrix.T
+
+        changed = []
+        for position, key in enumerate(self.keys):
+            current = self.top.get(key, [])
+            kept = [(job_id, score) for job_id, score in current if job_id not in replaced]
+            # A full, untouched list only accepts jobs that beat its last entry
+            floor = current[-1][1] if len(kept) >= self.k else -np.inf
+            row_scores = scores[position]
+            candidates = [(new_ids[i], float(row_scores[i])) for i in np.flatnonzero(row_scores > floor)]
+            if not candidates and len(kept) == len(current):
+                continue
+            merged = sorted(kept + candidates, key=lambda match: -match[1])[:self.k]
+            if merged != current:
+                self.top[key] = merged
+                changed.append(key)
+
+        if changed:
+            self._write(changed)
+        return len(changed)
+
+    def lookup(self, key: str, limit: int = 5,
+               index: Union[JobIndex, None] = None) -> Union[List[tuple[Dict, float]], None]:
+        """
+        Read the materialized matches for a resume key and return up to limit
+        deduplicated (job, score) pairs, or None if nothing is stored. Loaded or
+        refreshed resumes are served from memory, others with one keyed read.
+        Job rows come from the index when given (deleted jobs are skipped),
+        otherwise from the jobs table.
+        """
+        stored = self.top.get(key)
+        if stored is None:
+            row = self.storage.fetch_one(self.table, "resume_key", key)
+            if not row:
+                return None
+            stored = list(zip(row["job_ids"], row["scores"]))
+
+        if index is not None:
+            jobs_by_id = {job_id: index.get(job_id) for job_id, _ in stored}
+        else:
+            jobs = self.storage.fetch_in("jobs", "id", [job_id for job_id, _ in stored])
+            jobs_by_id = {job.get("id"): job for job in jobs}
+
+        results = []
+        seen = set()
+        for job_id, score in stored:
+            job = jobs_by_id.get(job_id)
+            if job is None or job_key(job) in seen:
+                continue
+            seen.add(job_key(job))
+            results.append((job, score))
+            if len(results) == limit:
+                break
+        return results
+
+
+if __name__ == "__main__":
+    from storage import open_storage
+
+    storage = open_storage()
+    job_index = JobIndex.from_storage(storage)
+    resume_rows = storage.fetch_rows("docx_files") + storage.fetch_rows("pdf_files")
+    count = ResumeMatchStore(storage).materialize(resume_rows, job_index)
+    print(f"Materialized matches for {count} resumes")
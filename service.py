@@ -0,0 +1,378 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+
+from job_index import JobIndex
+from metrics import metrics
+from resume_matches import ResumeMatchStore
+
+
+class LatencyRecorder:
+    """Keeps the most recent request latencies per route and reports percentiles"""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float):
+        self._samples.setdefault(route, deque(maxlen=self.window)).append(seconds)
+        self._counts[route] = self._counts.get(route, 0) + 1
+
+    def summary(self) -> Dict:
+        summary = {}
+        for route, samples in self._samples.items():
+            values = np.fromiter(samples, dtype=np.float64) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[route] = {
+                "count": self._counts[route],
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(values.max()), 3),
+            }
+        return summary
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+MAX_LIMIT = 100
+FILTER_KEYS = ("job_types", "employment_types", "min_salary")
+
+
+def _positive_int(body: Dict, key: str, default: Union[int, None], maximum: Union[int, None] = None):
+    value = body.get(key, default)
+    if value is None:
+        return None
+    # bool is an int subclass; reject it along with strings and floats
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise HTTPError(400, f"'{key}' must be a positive integer")
+    if maximum is not None and value > maximum:
+        raise HTTPError(400, f"'{key}' must be at most {maximum}")
+    return value
+
+
+def parse_search_params(body: Dict) -> Dict:
+    """Validated limit, candidate_cap and filters from a /match or /recommend body"""
+    filters = body.get("filters")
+    if filters is None:
+        filters = {}
+    if not isinstance(filters, dict):
+        raise HTTPError(400, "'filters' must be an object")
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise HTTPError(400, f"Unknown filters: {', '.join(sorted(unknown))}")
+
+    parsed = {}
+    for key in ("job_types", "employment_types"):
+        values = filters.get(key)
+        if values is None:
+            continue
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise HTTPError(400, f"'filters.{key}' must be a string or a list of strings")
+        parsed[key] = values
+    min_salary = filters.get("min_salary")
+    if min_salary is not None:
+        if isinstance(min_salary, bool) or not isinstance(min_salary, (int, float)):
+            raise HTTPError(400, "'filters.min_salary' must be a number")
+        parsed["min_salary"] = float(min_salary)
+
+    return {
+        "limit": _positive_int(body, "limit", 5, MAX_LIMIT),
+        "candidate_cap": _positive_int(body, "candidate_cap", None),
+        "filters": parsed,
+    }
+
+
+class RecommendationService:
+    """
+    ASGI app serving /match and /recommend from a job index loaded once.
+
+    Identical in-flight requests share one computation, and at most
+    max_concurrency requests are worked on at a time; once max_pending
+    requests are waiting, new ones are rejected with 503. With a match_store,
+    unfiltered requests by filename are answered from the materialized
+    top-k held in memory when it still covers `limit` jobs.
+    """
+
+    def __init__(self, index: JobIndex,
+                 fetch_resume: Callable[[str], Union[Dict, None]],
+                 generate_advice: Callable[[Dict, List], str],
+                 max_concurrency: int = 32,
+                 max_pending: int = 256,
+                 resume_cache_size: int = 1024,
+                 search_shards: int = 1,
+                 lexical_candidate_cap: Union[int, None] = None,
+                 match_store: Union[ResumeMatchStore, None] = None):
+        self.index = index
+        self.match_store = match_store
+        self.search_shards = search_shards
+        self.lexical_candidate_cap = lexical_candidate_cap
+        self.fetch_resume = fetch_resume
+        self.generate_advice = generate_advice
+        self.max_pending = max_pending
+        self.latency = LatencyRecorder()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending = 0
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self._resume_cache: OrderedDict = OrderedDict()
+        self._resume_cache_size = resume_cache_size
+        self.coalesced = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        start = time.perf_counter()
+        route = scope["path"]
+        try:
+            body = await self._read_body(receive)
+            status, payload = 200, await self._dispatch(scope["method"], route, body)
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+
+        await self._respond(send, status, payload)
+        if route in ("/match", "/recommend"):
+            self.latency.record(route, time.perf_counter() - start)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive) -> Dict:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        raw = b"".join(chunks)
+        if not raw:
+            return {}
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON")
+
+    async def _respond(self, send, status: int, payload: Union[Dict, str]):
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = b"text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, default=str).encode("utf-8")
+            content_type = b"application/json"
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type),
+                        (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _dispatch(self, method: str, route: str, body: Dict) -> Union[Dict, str]:
+        if route == "/health":
+            return {"status": "ok", "jobs": len(self.index)}
+        if route == "/metrics":
+            return {
+                "latency": self.latency.summary(),
+                "coalesced": self.coalesced,
+                "pending": self._pending,
+                "pipeline": metrics.snapshot(),
+            }
+        if route == "/metrics/prometheus":
+            return metrics.to_prometheus()
+        if method != "POST":
+            raise HTTPError(405, "Use POST")
+        if route in ("/match", "/recommend"):
+            if not isinstance(body, dict):
+                raise HTTPError(400, "Request body must be a JSON object")
+            # Reject bad input before it reaches storage or the index
+            parse_search_params(body)
+        if route == "/match":
+            return await self._coalesce(("match", self._request_key(body)), self._match, body)
+        if route == "/recommend":
+            return await self._coalesce(("recommend", self._request_key(body)), self._recommend, body)
+        raise HTTPError(404, f"Unknown route {route}")
+
+    def _request_key(self, body: Dict) -> str:
+        return json.dumps(body, sort_keys=True)
+
+    async def _coalesce(self, key: tuple, handler, body: Dict) -> Dict:
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        if self._pending >= self.max_pending:
+            raise HTTPError(503, "Too many requests in flight")
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                result = await handler(body)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # The leader's client went away; waiting followers still get an answer
+            future.set_exception(HTTPError(503, "Request was cancelled, retry"))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an un-awaited future does not log a warning
+            future.exception()
+            raise
+        finally:
+            self._pending -= 1
+            del self._in_flight[key]
+
+    async def _resume(self, body: Dict) -> Dict:
+        if "embedding" in body:
+            embedding = body["embedding"]
+            if (not isinstance(embedding, list) or not embedding
+                    or not all(isinstance(value, (int, float)) for value in embedding)):
+                raise HTTPError(400, "'embedding' must be a non-empty list of numbers")
+            return {"embeddings": embedding}
+        filename = body.get("filename")
+        if not filename:
+            raise HTTPError(400, "Provide 'filename' or 'embedding'")
+
+        resume_data = self._resume_cache.get(filename)
+        if resume_data is None:
+            resume_data = await asyncio.to_thread(self.fetch_resume, filename)
+            if not resume_data:
+                raise HTTPError(404, "Resume not found")
+            self._resume_cache[filename] = resume_data
+            if len(self._resume_cache) > self._resume_cache_size:
+                self._resume_cache.popitem(last=False)
+        else:
+            self._resume_cache.move_to_end(filename)
+        return resume_data
+
+    def _search(self, resume_data: Dict, params: Dict) -> List[tuple[Dict, float]]:
+        candidate_cap = params["candidate_cap"] or self.lexical_candidate_cap
+        with metrics.timer("similarity_scoring"):
+            return self.index.search(resume_data.get("embeddings", []), params["limit"],
+                                     shards=self.search_shards, skills=resume_data.get("skills"),
+                                     candidate_cap=candidate_cap, **params["filters"])
+
+    def _matches(self, resume_data: Dict, body: Dict) -> List[tuple[Dict, float]]:
+        params = parse_search_params(body)
+        filename = body.get("filename")
+        if (self.match_store is not None and filename in self.match_store.top
+                and not params["filters"] and params["candidate_cap"] is None):
+            stored = self.match_store.lookup(filename, params["limit"], index=self.index)
+            if stored is not None and len(stored) >= params["limit"]:
+                metrics.increment("materialized_match_hits")
+                return stored
+        return self._search(resume_data, params)
+
+    async def _match(self, body: Dict) -> Dict:
+        resume_data = await self._resume(body)
+        # Scoring a warm in-memory matrix is sub-millisecond; keep it on the loop
+        matches = self._matches(resume_data, body)
+        return {"matches": [{"job": job, "score": score} for job, score in matches]}
+
+    async def _recommend(self, body: Dict) -> Dict:
+        resume_data = await self._resume(body)
+        matches = self._matches(resume_data, body)
+        advice = await asyncio.to_thread(self.generate_advice, resume_data, matches)
+        return {
+            "matches": [{"job": job, "score": score} for job, score in matches],
+            "recommendations": advice,
+        }
+
+
+def create_app(max_concurrency: int = 32, sync_interval: float = 30.0,
+               snapshot_root: Union[str, None] = None,
+               materialized_matches: bool = True, search_shards: int = 1,
+               lexical_candidate_cap: Union[int, None] = None) -> RecommendationService:
+    """
+    Build the service on the configured storage backend and Groq client. With
+    snapshot_root, vectors are memory-mapped from the shared snapshot (and
+    reloaded when it is refreshed) instead of downloaded per worker.
+
+    Otherwise, with materialized_matches, the stored per-resume top-k is
+    loaded (and built on first start) and kept current by the index sync.
+    If that table cannot be read (see ResumeMatchStore for the Supabase DDL),
+    the service starts without it and ranks every request. Snapshot workers
+    have no per-job change feed, so they always rank.
+
+    search_shards and lexical_candidate_cap enable sharded scoring and the
+    BM25 skill prefilter for every request (a request's candidate_cap wins).
+    """
+    import ai_suggesstions
+    from llm_cache import LLMResponseCache
+
+    match_store = None
+
+    if snapshot_root:
+        from snapshot import SnapshotReloader, load_snapshot
+
+        index = load_snapshot(snapshot_root)
+        SnapshotReloader(index, snapshot_root).start()
+    else:
+        from index_sync import JobIndexSync
+
+        storage = ai_suggesstions.get_storage()
+        index = JobIndex.from_storage(storage)
+        if materialized_matches:
+            match_store = ResumeMatchStore(storage)
+            try:
+                resumes = storage.fetch_rows("docx_files") + storage.fetch_rows("pdf_files")
+                match_store.load(resumes)
+                if not match_store.top:
+                    match_store.materialize(resumes, index)
+            except Exception as e:
+                # e.g. the resume_matches table was never created on Supabase
+                print(f"Error loading stored matches, ranking every request: {str(e)}")
+                match_store = None
+        if sync_interval:
+            listeners = [match_store.refresh] if match_store is not None else []
+            JobIndexSync(index, storage, interval=sync_interval, on_upsert=listeners).start()
+    cache = LLMResponseCache()
+    return RecommendationService(
+        index,
+        fetch_resume=ai_suggesstions.fetch_resume_by_filename,
+        generate_advice=lambda resume_data, matches: ai_suggesstions.generate_job_recommendations(
+            resume_data, matches, cache=cache),
+        max_concurrency=max_concurrency,
+        search_shards=search_shards,
+        lexical_candidate_cap=lexical_candidate_cap,
+        match_store=match_store,
+    )
+
+
+if __name__ == "__main__":
+    import os
+
+    import uvicorn
+
+    candidate_cap = os.environ.get("JOB_LEXICAL_CANDIDATE_CAP")
+    uvicorn.run(create_app(snapshot_root=os.environ.get("JOB_SNAPSHOT_DIR"),
+                           search_shards=int(os.environ.get("JOB_SEARCH_SHARDS", "1")),
+                           lexical_candidate_cap=int(candidate_cap) if candidate_cap else None),
+                host="0.0.0.0", port=8000, log_level="warning")
@@ -0,0 +1,151 @@
+import re
+from typing import Dict, List, Union
+
+import numpy as np
+
+SKILL_FIELDS = ("relevant_skills", "required_qualifications")
+STOPWORDS = {
+    "a", "an", "and", "or", "the", "of", "in", "on", "for", "to", "with", "at", "by", "as",
+    "is", "are", "be", "we", "you", "our", "your", "will", "must", "should", "including",
+    "experience", "years", "year", "knowledge", "ability", "skills", "skill", "strong",
+    "excellent", "good", "plus", "etc", "n/a", "nan", "none",
+}
+# Keep tokens like c++, c#, node.js and .net intact
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]|\.net")
+
+
+def skill_tokens(text) -> List[str]:
+    """Lowercase skill tokens with stopwords and trailing punctuation removed"""
+    if text is None:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = " ".join(str(item) for item in text)
+    return [token for token in _TOKEN.findall(str(text).lower())
+            if (token not in STOPWORDS and len(token) > 1) or token in ("c", "r")]
+
+
+class SkillIndex:
+    """
+    Inverted index over normalized skill tokens of the jobs' relevant_skills
+    and required_qualifications, scored with BM25.
+    """
+
+    def __init__(self, postings: Dict[str, tuple[np.ndarray, np.ndarray]], doc_lengths: np.ndarray,
+                 k1: float = 1.2, b: float = 0.75):
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.size = len(doc_lengths)
+        self.avg_length = float(doc_lengths.mean()) if self.size and doc_lengths.sum() else 1.0
+
+    @classmethod
+    def build(cls, rows: List[Dict], offset: int = 0) -> "SkillIndex":
+        term_docs: Dict[str, List[int]] = {}
+        term_freqs: Dict[str, List[int]] = {}
+        doc_lengths = np.zeros(len(rows), dtype=np.float32)
+        for position, row in enumerate(rows):
+            tokens = []
+            for field in SKILL_FIELDS:
+                tokens.extend(skill_tokens(row.get(field)))
+            doc_lengths[position] = len(tokens)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_docs.setdefault(token, []).append(position + offset)
+                term_freqs.setdefault(token, []).append(count)
+
+        postings = {
+            token: (np.array(docs, dtype=np.int64), np.array(term_freqs[token], dtype=np.float32))
+            for token, docs in term_docs.items()
+        }
+        return cls(postings, doc_lengths)
+
+    def extend(self, rows: List[Dict]) -> "SkillIndex":
+        """New index covering the existing positions followed by rows"""
+        added = SkillIndex.build(rows, offset=self.size)
+        postings = dict(self.postings)
+        for token, (docs, freqs) in added.postings.items():
+            if token in postings:
+                old_docs, old_freqs = postings[token]
+                postings[token] = (np.concatenate([old_docs, docs]), np.concatenate([old_freqs, freqs]))
+            else:
+                postings[token] = (docs, freqs)
+        return SkillIndex(postings, np.concatenate([self.doc_lengths, added.doc_lengths]), self.k1, self.b)
+
+    def scores(self, query, alive: Union[np.ndarray, None] = None) -> np.ndarray:
+        """
+        BM25 score of every position for the query's skill tokens. With alive,
+        N and document frequencies count only live positions and dead ones
+        score 0.
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        live_docs = self.size if alive is None else int(np.count_nonzero(alive))
+        for token in set(skill_tokens(query)):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            docs, freqs = posting
+            df = len(docs) if alive is None else int(np.count_nonzero(alive[docs]))
+            if df == 0:
+                continue
+            idf = np.log(1.0 + (live_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+            scores[docs] += idf * freqs * (self.k1 + 1.0) / (freqs + norm)
+        if alive is not None:
+            scores[~alive] = 0.0
+        return scores
+
+    def candidates(self, query, cap: int, alive: Union[np.ndarray, None] = None,
+                   mask: Union[np.ndarray, None] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Positions of the `cap` best BM25 matches in ascending position order,
+        and their BM25 scores. Scores use corpus statistics over alive; mask
+        (e.g. a metadata filter) only restricts which positions are returned,
+        so a narrow filter cannot push common tokens to a negative idf.
+        """
+        scores = self.scores(query, alive)
+        if mask is not None:
+            scores[~mask] = 0.0
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > cap:
+            matched = matched[np.argpartition(-scores[matched], cap - 1)[:cap]]
+            matched.sort()
+        return matched, scores[matched]
+
+
+def recall_at_k(expected: List[tuple[Dict, float]], actual: List[tuple[Dict, float]]) -> float:
+    """Share of the expected job ids that also appear in actual"""
+    expected_ids = {job.get("id") for job, _ in expected}
+    if not expected_ids:
+        return 1.0
+    return len(expected_ids & {job.get("id") for job, _ in actual}) / len(expected_ids)
+
+
+def lexical_recall(index, resumes: List[Dict], limit: int = 5, candidate_cap: int = 500) -> float:
+    """
+    Mean recall@limit of the lexically prefiltered search against full dense
+    search, over resume rows with embeddings and skills.
+    """
+    recalls = []
+    for resume in resumes:
+        embedding = resume.get("embeddings")
+        if embedding is None or len(embedding) == 0:
+            continue
+        exact = index.search(embedding, limit)
+        prefiltered = index.search(embedding, limit, skills=resume.get("skills"), candidate_cap=candidate_cap)
+        recalls.append(recall_at_k(exact, prefiltered))
+    return float(np.mean(recalls)) if recalls else 1.0
+
+
+if __name__ == "__main__":
+    from job_index import JobIndex
+    from storage import open_storage
+
+    storage = open_storage()
+    job_index = JobIndex.from_storage(storage)
+    resume_rows = storage.fetch_rows("docx_files") + storage.fetch_rows("pdf_files")
+    for cap in (100, 250, 500, 1000, 2000):
+        recall = lexical_recall(job_index, resume_rows, candidate_cap=cap)
+        print(f"candidate_cap={cap:>5}  recall@5={recall:.3f}")
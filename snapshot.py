@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from job_index import JobIndex
+
+CURRENT_POINTER = "CURRENT"
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.parquet"
+MANIFEST_FILE = "manifest.json"
+
+
+def export_snapshot(index: JobIndex, root: str, keep: int = 2) -> str:
+    """
+    Write the index to a new snapshot directory under root and atomically
+    point root/CURRENT at it.
+
+    Layout: embeddings.npy holds the normalized float32 matrix, and
+    metadata.parquet holds the job rows in the same order. Older snapshots
+    beyond `keep` are removed. Workers that still have them mapped keep a
+    valid mapping, since unlinking does not invalidate an open mmap.
+    """
+    os.makedirs(root, exist_ok=True)
+    # Fixed-width fields so lexical order is creation order (_prune relies on it);
+    # wall-clock ns orders snapshots across processes, the pid breaks ties
+    now = time.time_ns()
+    name = (f"snapshot-{time.strftime('%Y%m%d-%H%M%S', time.gmtime(now / 1e9))}"
+            f"-{now % 1_000_000_000:09d}-{os.getpid():07d}")
+    staging = os.path.join(root, f".{name}.tmp")
+    os.makedirs(staging)
+
+    matrix = np.ascontiguousarray(index.matrix, dtype=np.float32)
+    rows = index.rows
+    np.save(os.path.join(staging, EMBEDDINGS_FILE), matrix)
+    pq.write_table(pa.Table.from_pylist(rows), os.path.join(staging, METADATA_FILE))
+    with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({"count": len(rows), "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+                   "created_at": time.time()}, f)
+
+    final = os.path.join(root, name)
+    os.rename(staging, final)
+
+    # os.replace is atomic, so readers see either the old or the new pointer
+    pointer_tmp = os.path.join(root, f".{CURRENT_POINTER}.{os.getpid()}.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, os.path.join(root, CURRENT_POINTER))
+
+    _prune(root, keep)
+    return final
+
+
+def _prune(root: str, keep: int):
+    snapshots = sorted(
+        entry for entry in os.listdir(root)
+        if entry.startswith("snapshot-") and os.path.isdir(os.path.join(root, entry))
+    )
+    current = current_snapshot(root)
+    for entry in snapshots[:-keep] if keep > 0 else snapshots:
+        if os.path.join(root, entry) != current:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def current_snapshot(root: str) -> Union[str, None]:
+    """Path of the snapshot root/CURRENT points at, or None"""
+    try:
+        with open(os.path.join(root, CURRENT_POINTER), encoding="utf-8") as f:
+            return os.path.join(root, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def read_snapshot(path: str) -> tuple[np.ndarray, List[Dict]]:
+    """
+    Open a snapshot directory: vectors are memory-mapped read-only, so every
+    process shares the same page-cached copy and nothing is read until used.
+    """
+    matrix = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode="r")
+    rows = pq.read_table(os.path.join(path, METADATA_FILE)).to_pylist()
+    return matrix, rows
+
+
+def load_snapshot(root: str) -> JobIndex:
+    """Build a JobIndex from the current snapshot under root"""
+    path = current_snapshot(root)
+    if path is None:
+        raise FileNotFoundError(f"No snapshot found in {root}")
+    return JobIndex.from_arrays(*read_snapshot(path))
+
+
+class SnapshotReloader:
+    """
+    Watch root/CURRENT and swap a live JobIndex to each new snapshot, so
+    workers pick up a refresh published by export_snapshot in another process.
+    """
+
+    def __init__(self, index: JobIndex, root: str, interval: float = 10.0):
+        self.index = index
+        self.root = root
+        self.interval = interval
+        self.loaded = current_snapshot(root)
+        self._stop = threading.Event()
+        self._thread: Union[threading.Thread, None] = None
+
+    def check_once(self) -> bool:
+        """Reload if CURRENT moved; returns True when a new snapshot was loaded"""
+        path = current_snapshot(self.root)
+        if path is None or path == self.loaded:
+            return False
+        self.index.reset(*read_snapshot(path))
+        self.loaded = path
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                print(f"Error reloading snapshot: {str(e)}")
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+if __name__ == "__main__":
+    import sys
+    from storage import open_storage
+
+    snapshot_root = sys.argv[1] if len(sys.argv) > 1 else "snapshots"
+    path = export_snapshot(JobIndex.from_storage(open_storage()), snapshot_root)
+    print(f"Snapshot written to {path}")
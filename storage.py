@@ -0,0 +1,350 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Union
+
+import numpy as np
+
+# Environment Variables
+SUPABASE_API_KEY = "your key"
+SUPABASE_URL = "your url"
+# "supabase" (default) or "sqlite:<path>" for the local backend
+STORAGE_ENV = "JOB_STORAGE"
+
+RESUME_TABLES = ("pdf_files", "docx_files")
+VECTOR_COLUMN = "embeddings"
+
+
+def _as_vector(value) -> Union[np.ndarray, None]:
+    """Embeddings may come back as lists, numpy arrays or pgvector strings"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    if len(value) == 0:
+        return None
+    return np.asarray(value, dtype=np.float32)
+
+
+def stack_vectors(rows: List[Dict], column: str = VECTOR_COLUMN) -> tuple[List[Dict], np.ndarray]:
+    """Split rows into (rows without the vector column, float32 matrix) skipping rows without one"""
+    kept = []
+    vectors = []
+    for row in rows:
+        vector = _as_vector(row.get(column))
+        if vector is None:
+            continue
+        vectors.append(vector)
+        kept.append({key: value for key, value in row.items() if key != column})
+    if not vectors:
+        return kept, np.zeros((0, 0), dtype=np.float32)
+    return kept, np.vstack(vectors)
+
+
+class Storage(ABC):
+    """
+    Storage backend for resumes, jobs and derived tables. Rows are plain
+    dicts; vectors live in the `embeddings` column.
+    """
+
+    @abstractmethod
+    def insert(self, table: str, record: Dict):
+        """Insert one row"""
+
+    @abstractmethod
+    def upsert(self, table: str, records: List[Dict], on_conflict: str):
+        """Insert rows, replacing existing rows with the same on_conflict value"""
+
+    @abstractmethod
+    def fetch_rows(self, table: str, columns: str = "*", order_by: str = "id",
+                   greater_than=None, at_least=None) -> List[Dict]:
+        """
+        All rows ordered by order_by, optionally only those whose order_by
+        value is > greater_than or >= at_least (watermark reads)
+        """
+
+    @abstractmethod
+    def fetch_one(self, table: str, column: str, value) -> Union[Dict, None]:
+        """First row where column == value"""
+
+    @abstractmethod
+    def fetch_in(self, table: str, column: str, values: List) -> List[Dict]:
+        """Rows whose column is one of values"""
+
+    def fetch_by_filename(self, filename: str) -> Union[Dict, None]:
+        """Resume row from the PDF or DOCX table, PDF first"""
+        for table in RESUME_TABLES:
+            row = self.fetch_one(table, "filename", filename)
+            if row:
+                return row
+        return None
+
+    def fetch_vectors(self, table: str, column: str = VECTOR_COLUMN) -> tuple[List[Dict], np.ndarray]:
+        """Bulk read of a table as (rows without vectors, float32 matrix)"""
+        return stack_vectors(self.fetch_rows(table), column)
+
+
+class SupabaseStorage(Storage):
+    """The hosted Supabase/PostgREST backend"""
+
+    def __init__(self, client=None, page_size: int = 1000):
+        if client is None:
+            from supabase import create_client
+            client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
+        self.client = client
+        self.page_size = page_size
+
+    def insert(self, table: str, record: Dict):
+        return self.client.table(table).insert(record).execute()
+
+    def upsert(self, table: str, records: List[Dict], on_conflict: str):
+        return self.client.table(table).upsert(records, on_conflict=on_conflict).execute()
+
+    def fetch_rows(self, table: str, columns: str = "*", order_by: str = "id",
+                   greater_than=None, at_least=None) -> List[Dict]:
+        rows = []
+        start = 0
+        while True:
+            query = self.client.table(table).select(columns)
+            if greater_than is not None:
+                query = query.gt(order_by, greater_than)
+            if at_least is not None:
+                query = query.gte(order_by, at_least)
+            response = query \
+                .order(order_by) \
+                .range(start, start + self.page_size - 1) \
+                .execute()
+            batch = response.data or []
+            rows.extend(batch)
+            if len(batch) < self.page_size:
+                return rows
+            start += self.page_size
+
+    def fetch_one(self, table: str, column: str, value) -> Union[Dict, None]:
+        response = self.client.table(table) \
+            .select("*") \
+            .eq(column, value) \
+            .limit(1) \
+            .execute()
+        return response.data[0] if response.data else None
+
+    def fetch_in(self, table: str, column: str, values: List) -> List[Dict]:
+        if not values:
+            return []
+        response = self.client.table(table) \
+            .select("*") \
+            .in_(column, list(values)) \
+            .execute()
+        return response.data or []
+
+
+class SQLiteStorage(Storage):
+    """
+    Local single-file backend for offline runs, batch jobs and benchmarks.
+
+    Every table has the same layout: an autoincrement id, the row as JSON,
+    an optional unique key and the embedding as a raw float32 blob, so bulk
+    vector reads are one query plus frombuffer.
+
+    upsert(on_conflict="id") matches on the primary key. Any other conflict
+    column is stored as the table's unique key; the first such upsert fixes
+    that column (recorded in _conflict_keys) and other columns are rejected.
+    """
+
+    def __init__(self, path: str = "jobs.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._tables = set()
+        self._indexed = set()
+        self._key_columns: Dict[str, str] = {}
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS _conflict_keys (table_name TEXT PRIMARY KEY, column_name TEXT NOT NULL)"
+        )
+
+    def _table(self, table: str) -> str:
+        if not table.replace("_", "").isalnum():
+            raise ValueError(f"Invalid table name: {table}")
+        if table not in self._tables:
+            self._conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS "{table}" (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    row_key TEXT UNIQUE,
+                    data TEXT NOT NULL,
+                    embeddings BLOB
+                )
+                """
+            )
+            self._tables.add(table)
+            # Resume lookups go by filename
+            self._index_column(table, "filename")
+        return f'"{table}"'
+
+    @staticmethod
+    def _encode(record: Dict) -> tuple[str, Union[bytes, None]]:
+        data = {key: value for key, value in record.items() if key not in ("id", VECTOR_COLUMN)}
+        vector = _as_vector(record.get(VECTOR_COLUMN))
+        return json.dumps(data, default=str), None if vector is None else vector.tobytes()
+
+    @staticmethod
+    def _decode(row_id: int, data: str, blob: Union[bytes, None], as_list: bool = True) -> Dict:
+        row = json.loads(data)
+        row["id"] = row_id
+        if blob is not None:
+            vector = np.frombuffer(blob, dtype=np.float32)
+            row[VECTOR_COLUMN] = vector.tolist() if as_list else vector
+        return row
+
+    def _order_expression(self, column: str) -> str:
+        if column == "id":
+            return "id"
+        if not column.replace("_", "").isalnum():
+            raise ValueError(f"Invalid column name: {column}")
+        return f"json_extract(data, '$.{column}')"
+
+    def insert(self, table: str, record: Dict):
+        data, blob = self._encode(record)
+        with self._lock:
+            name = self._table(table)
+            if record.get("id") is not None:
+                self._conn.execute(f"INSERT INTO {name} (id, data, embeddings) VALUES (?, ?, ?)",
+                                   (record["id"], data, blob))
+            else:
+                self._conn.execute(f"INSERT INTO {name} (data, embeddings) VALUES (?, ?)", (data, blob))
+            self._conn.commit()
+
+    def _index_column(self, table: str, column: str):
+        """Expression index so keyed reads such as fetch_one on column are lookups, not scans"""
+        if (table, column) in self._indexed:
+            return
+        expression = self._order_expression(column)
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{column}" ON "{table}" ({expression})')
+        self._indexed.add((table, column))
+
+    def _key_column(self, table: str, column: Union[str, None] = None) -> Union[str, None]:
+        """The table's unique key column, registering column if it has none yet"""
+        if table not in self._key_columns:
+            row = self._conn.execute("SELECT column_name FROM _conflict_keys WHERE table_name = ?",
+                                     (table,)).fetchone()
+            if row is None and column is not None:
+                self._conn.execute("INSERT INTO _conflict_keys (table_name, column_name) VALUES (?, ?)",
+                                   (table, column))
+                row = (column,)
+            if row is None:
+                return None
+            self._key_columns[table] = row[0]
+        return self._key_columns[table]
+
+    def upsert(self, table: str, records: List[Dict], on_conflict: str):
+        missing = [record for record in records if record.get(on_conflict) is None]
+        if missing:
+            raise ValueError(f"{len(missing)} record(s) for {table} have no {on_conflict} value")
+        with self._lock:
+            name = self._table(table)
+            if on_conflict == "id":
+                # Keep the unique key (if the table has one) in step with the row data
+                key_column = self._key_column(table)
+                for record in records:
+                    data, blob = self._encode(record)
+                    key = record.get(key_column) if key_column else None
+                    self._conn.execute(
+                        f"INSERT INTO {name} (id, row_key, data, embeddings) VALUES (?, ?, ?, ?) "
+                        f"ON CONFLICT(id) DO UPDATE SET row_key = excluded.row_key, data = excluded.data, "
+                        f"embeddings = excluded.embeddings",
+                        (record["id"], None if key is None else str(key), data, blob)
+                    )
+                self._conn.commit()
+                return
+
+            key_column = self._key_column(table, on_conflict)
+            if key_column != on_conflict:
+                raise ValueError(f"{table} is keyed on {key_column}; cannot upsert on {on_conflict}")
+            self._index_column(table, on_conflict)
+            for record in records:
+                data, blob = self._encode(record)
+                key = str(record[on_conflict])
+                self._conn.execute(
+                    f"INSERT INTO {name} (row_key, data, embeddings) VALUES (?, ?, ?) "
+                    f"ON CONFLICT(row_key) DO UPDATE SET data = excluded.data, embeddings = excluded.embeddings",
+                    (key, data, blob)
+                )
+            self._conn.commit()
+
+    def _select(self, table: str, where: str = "", params: tuple = (), order_by: str = "id",
+                limit: Union[int, None] = None, as_list: bool = True) -> List[Dict]:
+        limit_clause = f"LIMIT {int(limit)}" if limit is not None else ""
+        with self._lock:
+            name = self._table(table)
+            cursor = self._conn.execute(
+                f"SELECT id, data, embeddings FROM {name} {where} "
+                f"ORDER BY {self._order_expression(order_by)} {limit_clause}",
+                params
+            )
+            result = cursor.fetchall()
+        return [self._decode(*row, as_list=as_list) for row in result]
+
+    @staticmethod
+    def _project(rows: List[Dict], columns: str) -> List[Dict]:
+        if columns == "*":
+            return rows
+        wanted = [column.strip() for column in columns.split(",")]
+        return [{column: row.get(column) for column in wanted} for row in rows]
+
+    def fetch_rows(self, table: str, columns: str = "*", order_by: str = "id",
+                   greater_than=None, at_least=None) -> List[Dict]:
+        expression = self._order_expression(order_by)
+        clauses, params = [], []
+        if greater_than is not None:
+            clauses.append(f"{expression} > ?")
+            params.append(greater_than)
+        if at_least is not None:
+            clauses.append(f"{expression} >= ?")
+            params.append(at_least)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._project(self._select(table, where, tuple(params), order_by), columns)
+
+    def fetch_one(self, table: str, column: str, value) -> Union[Dict, None]:
+        rows = self._select(table, f"WHERE {self._order_expression(column)} = ?", (value,), limit=1)
+        return rows[0] if rows else None
+
+    def fetch_in(self, table: str, column: str, values: List) -> List[Dict]:
+        if not values:
+            return []
+        placeholders = ", ".join("?" for _ in values)
+        return self._select(table, f"WHERE {self._order_expression(column)} IN ({placeholders})",
+                            tuple(values))
+
+    def fetch_vectors(self, table: str, column: str = VECTOR_COLUMN) -> tuple[List[Dict], np.ndarray]:
+        with self._lock:
+            name = self._table(table)
+            result = self._conn.execute(
+                f"SELECT id, data, embeddings FROM {name} WHERE embeddings IS NOT NULL ORDER BY id"
+            ).fetchall()
+        if not result:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        rows = []
+        for row_id, data, _ in result:
+            row = json.loads(data)
+            row["id"] = row_id
+            rows.append(row)
+        # One contiguous buffer instead of a Python list per vector
+        matrix = np.frombuffer(b"".join(blob for _, _, blob in result), dtype=np.float32)
+        return rows, matrix.reshape(len(result), -1)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_storage(spec: Union[str, None] = None) -> Storage:
+    """Backend from spec or the JOB_STORAGE environment variable ('sqlite:<path>' or 'supabase')"""
+    spec = spec or os.environ.get(STORAGE_ENV, "supabase")
+    if spec.startswith("sqlite:"):
+        return SQLiteStorage(spec[len("sqlite:"):] or "jobs.db")
+    if spec == "supabase":
+        return SupabaseStorage()
+    raise ValueError(f"Unknown storage backend: {spec}")
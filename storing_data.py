@@ -1,17 +1,19 @@
 import os
 import pandas as pd
 import numpy as np
-from datasets import load_dataset
-from supabase import create_client, Client
-import ollama
 import time
 import json
+from functools import lru_cache
 
-# Environment Variables
-SUPABASE_API_KEY = "your key"
-SUPABASE_URL = "your url"
-# Initialize Supabase Client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
+from metrics import increment, timed, timer
+from storage import open_storage
+
+
+@lru_cache(maxsize=None)
+def get_storage():
+    """Storage backend, opened on first insert"""
+    # Supabase by default; set JOB_STORAGE=sqlite:<path> to write to a local file
+    return open_storage()
 
 def is_empty_or_nan(value):
     """Check if a value is empty or NaN, handling arrays properly"""
@@ -25,7 +27,10 @@ def is_empty_or_nan(value):
         return True
     return False
 
+@timed("embedding")
 def compute_embeddings(text, max_retries=3):
+    import ollama
+
     for attempt in range(max_retries):
         try:
             response = ollama.embeddings(
@@ -42,8 +47,10 @@ def compute_embeddings(text, max_retries=3):
                 raise ValueError("No embeddings found in response")
         except Exception as e:
             if attempt == max_retries - 1:
+                increment("embedding_failures")
                 print(f"Failed to generate embeddings after {max_retries} attempts: {str(e)}")
                 return None
+            increment("embedding_retries")
             print(f"Attempt {attempt + 1} failed, retrying...")
             time.sleep(1)
 
@@ -81,6 +88,7 @@ def process_field(value):
     
     return None
 
+@timed("text_assembly")
 def create_job_text(row):
     fields = {
         "company_name": clean_text(row.get("company_name")),
@@ -97,6 +105,7 @@ def create_job_text(row):
     }
     return " ".join(x for x in fields.values() if x)
 
+@timed("text_assembly")
 def create_resume_text(row):
     fields = {
         "name": clean_text(row.get("name")),
@@ -118,18 +127,25 @@ def insert_record(table_name, data):
                 processed_data[key] = processed_value
         
         if not processed_data:
+            increment("records_skipped")
             print(f"No valid data to insert for record in {table_name}")
             return False
             
-        response = supabase.table(table_name).insert(processed_data).execute()
+        with timer("db_write"):
+            get_storage().insert(table_name, processed_data)
+        increment("records_inserted")
         print(f"Successfully inserted record into {table_name}")
         return True
     except Exception as e:
+        increment("insert_errors")
         print(f"Error inserting data into {table_name}: {str(e)}")
         print(f"Problematic data: {data}")
         return False
 
 def main():
+    # datasets is slow to import; only ingestion needs it
+    from datasets import load_dataset
+
     # Load datasets
     try:
         job_dataset = load_dataset("will4381/job-posting-classification")["train"]
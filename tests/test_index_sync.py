@@ -0,0 +1,28 @@
+from index_sync import JobIndexSync
+from job_index import JobIndex
+from storage import SQLiteStorage
+
+
+def _insert(storage, i, updated_at):
+    storage.insert("jobs", {"company_name": f"company {i}", "job_position": "engineer",
+                            "updated_at": updated_at, "embeddings": [1.0, float(i)]})
+
+
+def test_timestamp_watermark_does_not_reapply_boundary_rows(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "jobs.db"))
+    for i in range(6):
+        _insert(storage, i, f"2026-01-01T00:00:0{i // 3}")
+    index = JobIndex([])
+    batches = []
+    sync = JobIndexSync(index, storage, watermark_column="updated_at", on_upsert=[batches.append])
+
+    assert sync.poll_once()["upserted"] == 6
+    for _ in range(3):
+        assert sync.poll_once()["upserted"] == 0
+    assert len(batches) == 1
+
+    # A new row at the boundary timestamp is still picked up, once
+    _insert(storage, 9, "2026-01-01T00:00:01")
+    assert sync.poll_once()["upserted"] == 1
+    assert sync.poll_once()["upserted"] == 0
+    assert len(index) == 7
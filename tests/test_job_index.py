@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pytest
+
+from job_index import JobIndex, parse_salary_range
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$80,000 - $100,000", (80000, 100000)),
+    ("$50k-$70k", (50000, 70000)),
+    ("$1.2M", (1200000, 1200000)),
+    ("$25/hour", (52000, 52000)),
+    ("$25 per hr", (52000, 52000)),
+    ("$500/day", (130000, 130000)),
+    ("$4k/mo", (48000, 48000)),
+    # Period words inside other words are not periods
+    ("$60,000 through $80,000", (60000, 80000)),
+    ("$120,000 (Monday-Friday)", (120000, 120000)),
+    # A following word is not a k/m suffix
+    ("$5,000 monthly", (60000, 60000)),
+    # Retirement plans are not part of the range
+    ("$60,000 - $80,000 + 401k", (60000, 80000)),
+    ("$90,000 plus 403(b)", (90000, 90000)),
+])
+def test_parse_salary_range(text, expected):
+    assert parse_salary_range(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "Competitive", "DOE"])
+def test_parse_salary_range_unknown(text):
+    assert all(math.isnan(value) for value in parse_salary_range(text))
+
+
+def _job(i, company, score):
+    return {"id": i, "company_name": company, "job_position": "engineer",
+            "embeddings": [score, math.sqrt(1 - score ** 2)]}
+
+
+def _ids(results):
+    return [job["id"] for job, _ in results]
+
+
+def test_sharded_dedupe_refetches_when_a_truncated_shard_runs_out():
+    # Shard A: nine postings of one job, then a unique one at 0.90; shard B: low scores
+    jobs = [_job(i, "dupe", 0.99 - i * 0.001) for i in range(9)]
+    jobs.append(_job(9, "unique", 0.90))
+    jobs += [_job(10 + i, f"low {i}", 0.1 + i * 0.01) for i in range(10)]
+    index = JobIndex(jobs)
+
+    assert _ids(index.search([1.0, 0.0], 2)) == [0, 9]
+    assert _ids(index.search([1.0, 0.0], 2, shards=2)) == [0, 9]
+
+
+@pytest.mark.parametrize("shards", [2, 3, 8])
+@pytest.mark.parametrize("limit", [1, 5, 20])
+def test_sharded_search_matches_single_shard_with_duplicate_keys(shards, limit):
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(300, 8))
+    # Few distinct company/position pairs, so most rows are duplicates
+    jobs = [{"id": i, "company_name": f"company {rng.integers(12)}", "job_position": "engineer",
+             "embeddings": vector.tolist()} for i, vector in enumerate(vectors)]
+    index = JobIndex(jobs)
+
+    for query in rng.normal(size=(10, 8)):
+        expected = index.search(query.tolist(), limit)
+        assert _ids(index.search(query.tolist(), limit, shards=shards)) == _ids(expected)
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+import ai_suggesstions
+from llm_cache import LLMResponseCache, StubLLMClient, make_cache_key
+
+RESUME = {"filename": "a.docx", "education": "BSc", "skills": "Python, SQL", "experience": "5 years"}
+JOBS = [{"id": 1, "company_name": "Acme", "job_position": "engineer"},
+        {"id": 2, "company_name": "Globex", "job_position": "analyst"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    yield cache
+    cache.close()
+
+
+def test_hit_skips_the_client_call(cache):
+    stub = StubLLMClient(response="advice")
+    first = ai_suggesstions.generate_job_recommendations(RESUME, JOBS, cache=cache, client=stub)
+    second = ai_suggesstions.generate_job_recommendations(RESUME, JOBS, cache=cache, client=stub)
+
+    assert first == second == "advice"
+    assert len(stub.calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_changed_job_order_misses(cache):
+    stub = StubLLMClient()
+    ai_suggesstions.generate_job_recommendations(RESUME, JOBS, cache=cache, client=stub)
+    ai_suggesstions.generate_job_recommendations(RESUME, JOBS[::-1], cache=cache, client=stub)
+
+    assert len(stub.calls) == 2
+
+
+@pytest.mark.parametrize("model, params", [
+    ("other-model", {"temperature": 0.7}),
+    ("model", {"temperature": 0.2}),
+])
+def test_changed_model_or_params_misses(model, params):
+    key = make_cache_key(RESUME, [1, 2], "model", "v1", {"temperature": 0.7})
+    assert make_cache_key(RESUME, [1, 2], "model", "v1", {"temperature": 0.7}) == key
+    assert make_cache_key(RESUME, [1, 2], model, "v1", params) != key
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"), ttl_seconds=60)
+    cache.set("key", "advice")
+    clock[0] += 59
+    assert cache.get("key") == "advice"
+    clock[0] += 2
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.set("a", "1")
+    clock[0] += 1
+    cache.set("b", "2")
+    clock[0] += 1
+    assert cache.get("a") == "1"
+    clock[0] += 1
+    cache.set("c", "3")
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
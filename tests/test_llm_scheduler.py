@@ -0,0 +1,71 @@
+import json
+from typing import Union
+
+import ai_suggesstions
+from llm_cache import StubLLMClient
+from llm_scheduler import RateLimitedScheduler
+
+
+class EchoClient(StubLLMClient):
+    """Answers with the user prompt so results can be matched to their request"""
+
+    def __init__(self, fail_on: Union[str, None] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_on = fail_on
+
+    def _create(self, stream: bool = False, **kwargs):
+        completion = super()._create(stream, **kwargs)
+        prompt = kwargs["messages"][-1]["content"]
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("provider unavailable")
+        completion.choices[0].message.content = prompt
+        return completion
+
+
+def _requests(count):
+    return [{"messages": [{"role": "user", "content": f"request {i}"}], "max_tokens": 10}
+            for i in range(count)]
+
+
+def test_rate_limited_requests_are_retried_and_returned_in_order():
+    client = EchoClient(rate_limit_every=3, retry_after=0.01)
+    scheduler = RateLimitedScheduler(client, requests_per_minute=6000, tokens_per_minute=600000,
+                                     max_workers=4)
+    delivered = []
+    results = scheduler.run(_requests(12), on_result=lambda idx, result: delivered.append(idx))
+
+    assert [result.choices[0].message.content for result in results] == [f"request {i}" for i in range(12)]
+    assert delivered == list(range(12))
+    injected = len(client.calls) // 3
+    assert injected > 0
+    assert scheduler.stats == {"requests": len(client.calls), "rate_limited": injected, "failed": 0}
+
+
+def test_exhausted_retries_count_every_rate_limit():
+    client = EchoClient(rate_limit_every=1, retry_after=0.0)
+    scheduler = RateLimitedScheduler(client, requests_per_minute=6000, tokens_per_minute=600000,
+                                     max_retries=1)
+    results = scheduler.run(_requests(3))
+
+    assert all(isinstance(result, Exception) for result in results)
+    assert scheduler.stats == {"requests": 6, "rate_limited": 6, "failed": 3}
+
+
+def test_bulk_writes_one_line_per_item_in_input_order(tmp_path):
+    items = [({"filename": f"resume{i}.docx", "skills": f"skill{i}"},
+              [{"id": i, "company_name": "Acme", "job_position": "engineer"}]) for i in range(8)]
+    client = EchoClient(fail_on="skill5", rate_limit_every=3, retry_after=0.01)
+    output = tmp_path / "advice.jsonl"
+
+    results = ai_suggesstions.generate_recommendations_bulk(
+        items, client=client, requests_per_minute=6000, tokens_per_minute=600000, max_workers=4,
+        output_path=str(output))
+
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line["filename"] for line in lines] == [f"resume{i}.docx" for i in range(8)]
+    assert [line["recommendations"] for line in lines] == results
+    for i, result in enumerate(results):
+        if i == 5:
+            assert result == "Unable to generate recommendations at this time."
+        else:
+            assert f"skill{i}" in result
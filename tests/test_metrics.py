@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from metrics import Metrics
+
+
+def test_failed_blocks_are_recorded_separately():
+    metrics = Metrics()
+    with metrics.timer("llm_generation"):
+        pass
+    with pytest.raises(ConnectionError):
+        with metrics.timer("llm_generation"):
+            raise ConnectionError("timeout")
+
+    stages = metrics.snapshot()["stages"]
+    assert stages["llm_generation"]["count"] == 1
+    assert stages["llm_generation_error"]["count"] == 1
+
+
+def test_exports():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.observe("embedding", 0.05)
+    metrics.observe("embedding", 0.5)
+    metrics.increment("records_inserted", 2)
+
+    text = metrics.to_prometheus()
+    assert 'resume_pipeline_stage_duration_seconds_bucket{stage="embedding",le="0.1"} 1' in text
+    assert 'resume_pipeline_stage_duration_seconds_bucket{stage="embedding",le="+Inf"} 2' in text
+    assert "resume_pipeline_records_inserted_total 2" in text
+    assert json.loads(metrics.to_json())["counters"] == {"records_inserted": 2}
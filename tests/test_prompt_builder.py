@@ -0,0 +1,40 @@
+import pytest
+
+import ai_suggesstions
+from llm_cache import StubLLMClient
+from metrics import metrics
+from prompt_builder import build_resume_context, dedupe_skills, estimate_tokens
+
+RESUME = {
+    "skills": "Python, python; SQL | sql, Machine Learning, machine learning ",
+    "experience": "; ".join(f"Led project {i} delivering analytics dashboards for clients" for i in range(60)),
+    "education": "BSc Computer Science; MSc Data Science",
+}
+JOBS = [{"job_position": f"Engineer {i}", "company_name": f"Company {i}",
+         "required_qualifications": "; ".join(f"Requirement {j} for role {i}" for j in range(30)),
+         "job_responsibilities": "; ".join(f"Responsibility {j} for role {i}" for j in range(30))}
+        for i in range(5)]
+
+
+def test_dedupe_skills_is_case_insensitive():
+    assert dedupe_skills(RESUME["skills"]) == ["Python", "SQL", "Machine Learning"]
+
+
+@pytest.mark.parametrize("budget", [400, 800, 1500])
+def test_context_stays_within_budget(budget):
+    context, stats = build_resume_context(RESUME, JOBS, budget)
+
+    assert estimate_tokens(context) == stats["tokens_after"] <= budget
+    assert stats["tokens_before"] > budget
+    assert stats["truncated"]
+    assert "Skills: Python, SQL, Machine Learning" in context
+
+
+def test_blocking_path_records_prompt_tokens():
+    before = metrics.snapshot()["counters"]
+    ai_suggesstions.generate_job_recommendations(RESUME, JOBS, client=StubLLMClient())
+    after = metrics.snapshot()["counters"]
+
+    _, stats = build_resume_context(RESUME, JOBS, ai_suggesstions.PROMPT_TOKEN_BUDGET)
+    assert after["prompt_tokens_before"] - before.get("prompt_tokens_before", 0) == stats["tokens_before"]
+    assert after["prompt_tokens_after"] - before.get("prompt_tokens_after", 0) == stats["tokens_after"]
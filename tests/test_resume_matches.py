@@ -0,0 +1,51 @@
+import pytest
+
+from job_index import JobIndex
+from resume_matches import ResumeMatchStore
+from storage import SQLiteStorage
+
+
+def _job(job_id, vector, company=None):
+    return {"id": job_id, "company_name": company or f"company {job_id}", "job_position": "engineer",
+            "embeddings": vector}
+
+
+@pytest.fixture
+def store(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "jobs.db"))
+    jobs = [_job(1, [1.0, 0.0]), _job(2, [0.8, 0.6]), _job(3, [0.0, 1.0])]
+    for job in jobs:
+        storage.insert("jobs", job)
+    store = ResumeMatchStore(storage, k=2)
+    store.materialize([{"filename": "a.docx", "embeddings": [1.0, 0.0]}], JobIndex(jobs))
+    return store
+
+
+def _ids(store, key="a.docx"):
+    return [job_id for job_id, _ in store.top[key]]
+
+
+def test_refresh_merges_better_new_job(store):
+    assert _ids(store) == [1, 2]
+    store.storage.insert("jobs", _job(4, [0.9, 0.1]))
+    assert store.refresh([_job(4, [0.9, 0.1])]) == 1
+    assert _ids(store) == [1, 4]
+
+
+def test_refresh_ignores_new_job_below_full_list(store):
+    assert store.refresh([_job(5, [-1.0, 0.0])]) == 0
+    assert _ids(store) == [1, 2]
+
+
+def test_refresh_replaces_updated_job(store):
+    # Job 1 was edited and now points away from the resume
+    assert store.refresh([_job(1, [0.0, 1.0])]) == 1
+    assert _ids(store) == [2, 1]
+    assert store.top["a.docx"][1][1] == pytest.approx(0.0)
+
+
+def test_refresh_is_persisted_and_read_back(store):
+    store.storage.insert("jobs", _job(4, [0.9, 0.1]))
+    store.refresh([_job(4, [0.9, 0.1])])
+    reloaded = ResumeMatchStore(store.storage, k=2)
+    assert [job.get("id") for job, _ in reloaded.lookup("a.docx", limit=2)] == [1, 4]
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from job_index import JobIndex
+from service import HTTPError, RecommendationService
+
+
+def _service():
+    rng = np.random.default_rng(0)
+    jobs = [{"id": i, "company_name": f"company {i}", "job_position": "engineer", "job_type": "IT",
+             "salary_range": "$100,000", "embeddings": rng.normal(size=8).tolist()} for i in range(50)]
+    return RecommendationService(JobIndex(jobs), fetch_resume=lambda filename: None,
+                                 generate_advice=lambda resume_data, matches: "")
+
+
+def _post(app, path, body):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(body).encode()}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app({"type": "http", "path": path, "method": "POST"}, receive, send))
+    return messages[0]["status"], json.loads(messages[1]["body"])
+
+
+@pytest.mark.parametrize("body", [
+    {"limit": 0},
+    {"limit": -1},
+    {"limit": "x"},
+    {"limit": 2.5},
+    {"limit": 10000},
+    {"candidate_cap": 0},
+    {"filters": {"min_salary": "abc"}},
+    {"filters": {"job_types": 5}},
+    {"filters": {"salary": 1}},
+    {"filters": []},
+    {"embedding": "abc"},
+])
+def test_invalid_match_requests_are_rejected(body):
+    body = {"embedding": [1.0] * 8, **body}
+    status, payload = _post(_service(), "/match", body)
+    assert status == 400
+    assert "error" in payload
+
+
+def test_valid_match_request():
+    status, payload = _post(_service(), "/match", {"embedding": [1.0] * 8, "limit": 3,
+                                                   "filters": {"job_types": "IT", "min_salary": 90000}})
+    assert status == 200
+    assert len(payload["matches"]) == 3
+
+
+def test_cancelled_leader_releases_coalesced_followers():
+    service = _service()
+    started = asyncio.Event()
+
+    async def handler(body):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def run():
+        leader = asyncio.create_task(service._coalesce(("match", "key"), handler, {}))
+        await started.wait()
+        follower = asyncio.create_task(service._coalesce(("match", "key"), handler, {}))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(HTTPError) as error:
+            await asyncio.wait_for(follower, timeout=1)
+        return error.value.status
+
+    assert asyncio.run(run()) == 503
+    assert service.coalesced == 1
+    assert not service._in_flight
+
+
+def test_create_app_starts_without_resume_matches_table(tmp_path, monkeypatch):
+    import ai_suggesstions
+    from service import create_app
+    from storage import SQLiteStorage
+
+    class NoMatchesTable(SQLiteStorage):
+        def fetch_rows(self, table, *args, **kwargs):
+            if table == "resume_matches":
+                raise RuntimeError('relation "resume_matches" does not exist')
+            return super().fetch_rows(table, *args, **kwargs)
+
+    storage = NoMatchesTable(str(tmp_path / "jobs.db"))
+    storage.insert("jobs", {"company_name": "company", "job_position": "engineer", "embeddings": [1.0, 0.0]})
+    monkeypatch.setattr(ai_suggesstions, "get_storage", lambda: storage)
+    monkeypatch.chdir(tmp_path)
+
+    app = create_app(sync_interval=0)
+    assert app.match_store is None
+    status, payload = _post(app, "/match", {"embedding": [1.0, 0.0]})
+    assert status == 200 and len(payload["matches"]) == 1
@@ -0,0 +1,34 @@
+import numpy as np
+
+from job_index import JobIndex
+from skill_index import SkillIndex
+
+
+def _jobs(count=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "id": i,
+        "company_name": f"company {i}",
+        "job_position": "engineer",
+        "job_type": "IT" if i % 20 == 0 else "Other",
+        "relevant_skills": "rust" if i < 2 else "python sql",
+        "embeddings": rng.normal(size=dim).tolist(),
+    } for i in range(count)]
+
+
+def test_masked_candidates_keep_corpus_idf():
+    rows = _jobs()
+    index = SkillIndex.build(rows)
+    alive = np.ones(len(rows), dtype=bool)
+    mask = np.array([row["job_type"] == "IT" for row in rows])
+
+    positions, scores = index.candidates("python", 50, alive, mask)
+    assert len(positions) == 50
+    assert (scores > 0).all()
+    assert mask[positions].all()
+
+
+def test_lexical_search_falls_back_when_too_few_candidates():
+    index = JobIndex(_jobs())
+    query = np.random.default_rng(1).normal(size=16)
+    assert index.search(query, 5, skills="rust", candidate_cap=100) == index.search(query, 5)
@@ -0,0 +1,14 @@
+import os
+
+from job_index import JobIndex
+from snapshot import current_snapshot, export_snapshot, load_snapshot
+
+
+def test_prune_keeps_the_newest_snapshots(tmp_path):
+    index = JobIndex([{"id": 1, "company_name": "a", "job_position": "b", "embeddings": [1.0, 0.0]}])
+    paths = [export_snapshot(index, str(tmp_path), keep=2) for _ in range(5)]
+
+    remaining = sorted(entry for entry in os.listdir(tmp_path) if entry.startswith("snapshot-"))
+    assert [os.path.join(str(tmp_path), entry) for entry in remaining] == paths[-2:]
+    assert current_snapshot(str(tmp_path)) == paths[-1]
+    assert len(load_snapshot(str(tmp_path))) == 1
@@ -0,0 +1,62 @@
+import pytest
+
+from storage import SQLiteStorage
+
+
+def test_upsert_key_lookups_use_an_index(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "jobs.db"))
+    storage.upsert("resume_matches", [{"resume_key": f"r{i}.docx", "job_ids": [i]} for i in range(100)],
+                   on_conflict="resume_key")
+    plan = storage._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM resume_matches WHERE json_extract(data, '$.resume_key') = ?",
+        ("r5.docx",)
+    ).fetchall()
+    assert "USING INDEX" in plan[0][-1]
+    assert storage.fetch_one("resume_matches", "resume_key", "r5.docx")["job_ids"] == [5]
+
+
+def test_upsert_replaces_by_key(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "jobs.db"))
+    storage.upsert("resume_matches", [{"resume_key": "a", "job_ids": [1]}], on_conflict="resume_key")
+    storage.upsert("resume_matches", [{"resume_key": "a", "job_ids": [2]}], on_conflict="resume_key")
+    assert [row["job_ids"] for row in storage.fetch_rows("resume_matches")] == [[2]]
+
+
+def test_upsert_rejects_records_without_key(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "jobs.db"))
+    with pytest.raises(ValueError):
+        storage.upsert("resume_matches", [{"resume_key": "a"}, {"job_ids": [1]}], on_conflict="resume_key")
+    assert storage.fetch_rows("resume_matches") == []
+
+
+def test_upsert_on_id_replaces_the_row_with_that_id(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "jobs.db"))
+    storage.insert("jobs", {"id": 7, "job_position": "engineer"})
+    storage.upsert("jobs", [{"id": 7, "job_position": "senior engineer"}, {"id": 9, "job_position": "analyst"}],
+                   on_conflict="id")
+    rows = storage.fetch_rows("jobs")
+    assert [(row["id"], row["job_position"]) for row in rows] == [(7, "senior engineer"), (9, "analyst")]
+
+
+def test_upsert_on_id_keeps_the_unique_key_current(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "jobs.db"))
+    storage.upsert("resume_matches", [{"resume_key": "a", "job_ids": [1]}], on_conflict="resume_key")
+    row_id = storage.fetch_one("resume_matches", "resume_key", "a")["id"]
+    storage.upsert("resume_matches", [{"id": row_id, "resume_key": "b", "job_ids": [2]}], on_conflict="id")
+    storage.upsert("resume_matches", [{"resume_key": "b", "job_ids": [3]}], on_conflict="resume_key")
+    assert [(row["id"], row["job_ids"]) for row in storage.fetch_rows("resume_matches")] == [(row_id, [3])]
+
+
+def test_upsert_rejects_a_second_conflict_column(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    storage = SQLiteStorage(path)
+    storage.upsert("resume_matches", [{"resume_key": "a", "filename": "x"}], on_conflict="resume_key")
+    with pytest.raises(ValueError):
+        storage.upsert("resume_matches", [{"resume_key": "b", "filename": "a"}], on_conflict="filename")
+    storage.close()
+
+    # The key column is remembered across connections
+    reopened = SQLiteStorage(path)
+    with pytest.raises(ValueError):
+        reopened.upsert("resume_matches", [{"resume_key": "b", "filename": "a"}], on_conflict="filename")
+    assert len(reopened.fetch_rows("resume_matches")) == 1